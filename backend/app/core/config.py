@@ -1,5 +1,4 @@
 from pydantic_settings import BaseSettings
-from functools import lru_cache
 import os
 from dotenv import load_dotenv
 from pydantic import ConfigDict
@@ -28,6 +27,8 @@ class Settings(BaseSettings):
 
     model_config = ConfigDict(env_file=".env", case_sensitive=True, extra="allow")
 
-@lru_cache()
+# Settings are read once at import; get_settings() is kept for existing callers
+settings = Settings()
+
 def get_settings() -> Settings:
-    return Settings() 
\ No newline at end of file
+    return settings 
\ No newline at end of file
@@ -1,15 +1,18 @@
-from typing import Generator
-from fastapi import Depends
+from fastapi import Request
+import logging
 # from sqlalchemy.orm import Session # Session might also be unused now
 
 # Removed: from .core.database import SessionLocal
-from .services.hevy_api import HevyAPI
+from .core.config import get_settings
+from .services.hevy_api import HevyAPI, get_shared_hevy_api
 from .services.workout_optimizer import WorkoutOptimizer
 from .services.ai_workout_optimizer import AIWorkoutOptimizer
 from .services.intent_service import IntentService
 
+log = logging.getLogger(__name__)
+
 # Removed unused get_db function:
-# def get_db() -> Generator:
+# def get_db():
 #     try:
 #         db = SessionLocal()
 #         yield db
@@ -18,29 +21,36 @@ from .services.intent_service import IntentService
 
 # --- Create Singleton Instances --- 
 # Create instances once when the module loads
-_hevy_api_instance = HevyAPI()
+_hevy_api_instance = get_shared_hevy_api()
+_workout_optimizer_instance = WorkoutOptimizer(_hevy_api_instance)
 _ai_optimizer_instance = AIWorkoutOptimizer(hevy_api=_hevy_api_instance)
 _intent_service_instance = IntentService(hevy_api=_hevy_api_instance)
+_settings = get_settings()
 
 # --- Dependency Functions now return singletons --- 
-def get_hevy_api() -> HevyAPI:
+# Declared async so FastAPI resolves them on the event loop instead of
+# dispatching each one to the threadpool.
+async def get_hevy_api(request: Request) -> HevyAPI:
     """Returns the singleton HevyAPI instance."""
-    # TODO: Add error handling if instance creation failed?
+    # A failed instance creation (e.g. missing HEVY_API_KEY) raises at import, so there is always an instance here
+    if _settings.DEBUG:
+        # The lifespan hands its pooled client to this instance; catch anything that swaps it out
+        shared_client = getattr(request.app.state, "http_client", None)
+        if shared_client is not None and shared_client is not _hevy_api_instance.client:
+            log.error("HevyAPI is not using the shared app.state.http_client")
     return _hevy_api_instance
 
-def get_workout_optimizer(hevy_api: HevyAPI = Depends(get_hevy_api)) -> WorkoutOptimizer:
-    # Note: WorkoutOptimizer might not need to be a singleton if it's stateless,
-    # but AIWorkoutOptimizer wraps it, so we only need the AI one as singleton.
-    # If needed, create _workout_optimizer_instance similarly.
-    # For now, creating it dynamically based on the singleton HevyAPI is fine.
-    return WorkoutOptimizer(hevy_api)
+async def get_workout_optimizer() -> WorkoutOptimizer:
+    """Returns the singleton WorkoutOptimizer instance."""
+    # WorkoutOptimizer is stateless apart from the shared HevyAPI, so one instance is enough.
+    return _workout_optimizer_instance
 
-def get_ai_optimizer() -> AIWorkoutOptimizer:
+async def get_ai_optimizer() -> AIWorkoutOptimizer:
     """Returns the singleton AIWorkoutOptimizer instance."""
     # Note: Removed Depends(get_hevy_api) as instance already has it.
     return _ai_optimizer_instance
 
-def get_intent_service() -> IntentService:
+async def get_intent_service() -> IntentService:
     """Returns the singleton IntentService instance."""
     # Note: Removed Depends(get_hevy_api) as instance already has it.
-    return _intent_service_instance 
\ No newline at end of file
+    return _intent_service_instance 
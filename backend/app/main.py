@@ -1,57 +1,87 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
+from fastapi.responses import ORJSONResponse
 import os
-import httpx
 from contextlib import asynccontextmanager
-import traceback
+import logging
+import logging.handlers
+import queue
+from typing import Tuple
 
 from .routers import chat_router, workouts_router, analysis_router, optimizer_router
 from .services.hevy_api import HevyAPI
-from .services.workout_optimizer import WorkoutOptimizer
 from .services.ai_workout_optimizer import AIWorkoutOptimizer
+# Use the same HevyAPI singleton that Depends(get_hevy_api) hands to the routers
+from .dependencies import _hevy_api_instance as hevy_api
+from .core.config import get_settings
 
-# Load environment variables
-load_dotenv()
+log = logging.getLogger(__name__)
 
-# Initialize services
-hevy_api = HevyAPI()
-workout_optimizer = WorkoutOptimizer(hevy_api)
-ai_optimizer = AIWorkoutOptimizer(hevy_api)
+def _start_logging() -> Tuple[logging.handlers.QueueHandler, logging.handlers.QueueListener]:
+    """
+    Send log records through a queue so the stderr writes happen on a
+    background thread instead of blocking the event loop.
+    Called once per app lifespan; undo with _stop_logging on shutdown.
+    """
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    root_logger = logging.getLogger()
+    root_logger.addHandler(queue_handler)
+    root_logger.setLevel(logging.INFO)
+    # Verbose app logs only in DEBUG mode; third-party libraries stay at INFO
+    logging.getLogger(__name__.rpartition(".")[0]).setLevel(logging.DEBUG if get_settings().DEBUG else logging.INFO)
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return queue_handler, listener
+
+def _stop_logging(queue_handler: logging.handlers.QueueHandler, listener: logging.handlers.QueueListener) -> None:
+    """Detaches the queue handler, then flushes the queued records and stops the listener thread."""
+    logging.getLogger().removeHandler(queue_handler)
+    listener.stop()
 
 # --- UPDATED: Lifespan context manager for startup/shutdown events ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Code to run on startup
-    print("--- FastAPI App Startup: Initializing HTTP client and loading cache... ---")
-    # Initialize the client passed to HevyAPI (or re-init if needed)
-    # Ensure the client is initialized before loading cache
-    app.state.http_client = httpx.AsyncClient(headers=hevy_api.headers) # Store client in app state if needed elsewhere
-    hevy_api.client = app.state.http_client # Ensure HevyAPI uses this client
-    
+    log_handler, log_listener = _start_logging()
+    log.info("--- FastAPI App Startup: Initializing HTTP client and loading cache... ---")
+    # HevyAPI owns its pooled HTTP/2 client; expose it in app state if needed elsewhere
+    app.state.http_client = hevy_api.client
+
+    # Warm up the pool so the first real request doesn't pay DNS + TLS setup
+    try:
+        await app.state.http_client.get(f"{HevyAPI.BASE_URL}/workouts", params={"page": 1, "pageSize": 1})
+        log.info("--- FastAPI App Startup: HTTP connection pool warmed up. ---")
+    except Exception:
+        log.exception("--- FastAPI App Startup: Connection warm-up failed (continuing) ---")
+
     # Load template cache using the initialized client via HevyAPI instance
     # --- ADDED Try/Except for robust startup logging ---
     try:
         await AIWorkoutOptimizer.load_templates_cache(hevy_api)
-        print("--- FastAPI App Startup: Cache loading call completed. ---")
-    except Exception as e:
-        print(f"--- FastAPI App Startup: !!! FAILED to load template cache: {e} !!! ---")
-        traceback.print_exc() # Print full traceback on startup error
+        log.info("--- FastAPI App Startup: Cache loading call completed. ---")
+    except Exception:
+        log.exception("--- FastAPI App Startup: !!! FAILED to load template cache !!! ---") # Full traceback on startup error
         # Optionally re-raise or handle differently if needed
     # --- END Try/Except ---
     
-    print("--- FastAPI App Startup: Lifespan startup phase complete. Yielding... ---")
+    log.info("--- FastAPI App Startup: Lifespan startup phase complete. Yielding... ---")
     yield
     # Code to run on shutdown
-    print("--- FastAPI App Shutdown: Closing HTTP client... ---")
-    await app.state.http_client.aclose()
-    print("--- FastAPI App Shutdown: HTTP client closed. --- ")
+    log.info("--- FastAPI App Shutdown: Closing HTTP client... ---")
+    await hevy_api.aclose()
+    await AIWorkoutOptimizer.aclose_http_client() # OpenAI + SerpApi pool
+    log.info("--- FastAPI App Shutdown: HTTP client closed. ---")
+    _stop_logging(log_handler, log_listener) # Flush any queued log records
 
 # Create FastAPI app and attach lifespan
 app = FastAPI(
     title="Hevy Workout Optimizer API",
     description="API for analyzing and optimizing workouts using AI",
     version="1.0.0",
+    default_response_class=ORJSONResponse, # orjson for every router's Dict responses
     lifespan=lifespan # Assign the lifespan manager
 )
 
@@ -70,19 +100,24 @@ app.include_router(analysis_router, prefix="/api/analysis", tags=["analysis"])
 app.include_router(chat_router, prefix="/api/chat", tags=["chat"])
 app.include_router(optimizer_router, prefix="/api/optimizer", tags=["optimizer"])
 
+# Static payloads for the probe endpoints, built once instead of per hit
+_ROOT = {
+    "status": "online",
+    "version": "1.0.0",
+    "docs_url": "/docs"
+}
+_HEALTH = {"status": "healthy"}
+
 @app.get("/")
 async def root():
     """Root endpoint to verify API is running"""
-    return {
-        "status": "online",
-        "version": "1.0.0",
-        "docs_url": "/docs"
-    }
+    return _ROOT
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return _HEALTH
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    # Single worker on purpose: chat state (history, pending swaps) lives in-process
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools") 
\ No newline at end of file
@@ -51,8 +51,7 @@ async def analyze_exercise_progress(
     """
     Analyze progress for a specific exercise over time.
     """
-    analysis = await workout_optimizer.analyze_workout_history(days)
-    exercise_data = analysis.get("exercise_analysis", {}).get(exercise_id)
+    exercise_data = await workout_optimizer.analyze_one_exercise(exercise_id, days)
     
     if not exercise_data:
         raise HTTPException(
@@ -1,19 +1,78 @@
 from fastapi import APIRouter, Depends, HTTPException, Body
 from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
-import re
+from pydantic import BaseModel, ConfigDict
+import logging
+from cachetools import TTLCache
 
-from ..services.ai_workout_optimizer import AIWorkoutOptimizer
+from ..services.ai_workout_optimizer import AIWorkoutOptimizer, _CHOSEN_ALT_RE
 from ..dependencies import get_ai_optimizer
 from ..services.intent_service import IntentService
 from ..dependencies import get_intent_service
 
+log = logging.getLogger(__name__)
+
 router = APIRouter()
 
+# Messages that are unambiguously a greeting, matched after lower-casing and trimming punctuation
+_GREETING_SET = frozenset({"hi", "hello", "hey", "yo", "sup", "hiya"})
+
 class ChatMessage(BaseModel):
     """Schema for chat messages"""
     message: str
 
+    model_config = ConfigDict(extra="ignore", frozen=True, str_strip_whitespace=True)
+
+# Recently gathered context, keyed by (intent, message), so repeated questions skip the Hevy fan-out
+_ctx_cache: TTLCache = TTLCache(maxsize=512, ttl=60)
+# Intents whose handlers never read context
+_NO_CONTEXT_INTENTS = frozenset({"GREETING", "UNKNOWN"})
+# Intents whose context feeds a routine change; always fetched fresh so edits aren't based on stale data
+_UNCACHED_CONTEXT_INTENTS = frozenset({"EXERCISE_SWAP", "ROUTINE_UPDATE", "PROGRAM_CREATE", "SUGGESTION_IMPLEMENT"})
+
+async def _get_context(intent_service: IntentService, intent: str, user_message: str) -> Dict[str, Any]:
+    """Returns context for the intent, reusing a recent successful result for the same question."""
+    if intent in _NO_CONTEXT_INTENTS:
+        return {}
+    if intent in _UNCACHED_CONTEXT_INTENTS:
+        return await intent_service.get_relevant_context(intent, user_message)
+    key = (intent, user_message)
+    context = _ctx_cache.get(key)
+    if context is None:
+        try:
+            context = await intent_service.get_relevant_context(intent, user_message, raise_errors=True)
+        except Exception: # Already logged by IntentService; answer without context and retry next time
+            return {}
+        if context: # Empty usually means a lookup failed quietly; don't pin that for the TTL
+            _ctx_cache[key] = context
+    return context
+
+# Canned replies for intents that need no AI call; returned as-is and kept out of the conversation history
+_GREETING_RESP = {"response": "Hello! How can I help you with your workouts today?", "intent": "GREETING"}
+_UNKNOWN_RESP = {"response": "Sorry, I'm not sure how to help with that. Can you please rephrase or ask about your workouts?", "intent": "UNKNOWN"}
+_STATIC_RESPONSES = {"GREETING": _GREETING_RESP, "UNKNOWN": _UNKNOWN_RESP}
+
+# --- Intent handlers, dispatched by intent key from workout_chat ---
+async def _info(ai_optimizer: AIWorkoutOptimizer, user_message: str, intent: str, context: Dict[str, Any]) -> str:
+    log.debug("--- Routing to Information Retrieval (Intent: %s) ---", intent)
+    return await ai_optimizer.get_info_response(user_message, intent, context)
+
+async def _analysis(ai_optimizer: AIWorkoutOptimizer, user_message: str, intent: str, context: Dict[str, Any]) -> str:
+    log.debug("--- Routing to Analysis (Intent: %s) ---", intent)
+    return await ai_optimizer.get_analysis_response(user_message, intent, context)
+
+async def _modification(ai_optimizer: AIWorkoutOptimizer, user_message: str, intent: str, context: Dict[str, Any]) -> str:
+    if intent == "SUGGESTION_IMPLEMENT" and not context.get('chosen_alternative_title'):
+        # Context is normally populated from the pending swap state; the AIWorkoutOptimizer handler asks for clarification otherwise
+        log.warning("--- SUGGESTION_IMPLEMENT intent routed, but context missing chosen_alternative_title. Handler needs to cope. ---")
+    log.debug("--- Routing to Modification/Action (Intent: %s) ---", intent)
+    return await ai_optimizer.get_modification_response(user_message, intent, context)
+
+_INTENT_HANDLERS = {
+    **dict.fromkeys(["WORKOUT_INFO", "EXERCISE_INFO", "ROUTINE_INFO", "PROGRAM_INFO", "GENERAL_INFO"], _info),
+    **dict.fromkeys(["WORKOUT_ANALYSIS", "PROGRAM_ANALYSIS", "EXERCISE_ANALYSIS", "COMPARATIVE_ANALYSIS"], _analysis),
+    **dict.fromkeys(["EXERCISE_SWAP", "PROGRAM_CREATE", "ROUTINE_UPDATE", "SUGGESTION_IMPLEMENT"], _modification),
+}
+
 @router.post("/")
 async def workout_chat(
     chat_input: ChatMessage,
@@ -24,9 +83,10 @@ async def workout_chat(
     Process chat messages based on classified intent and relevant context.
     """
     try:
-        print(f"\n--- Processing Chat Request: '{chat_input.message}' ---")
+        log.info("--- Processing Chat Request: '%s' ---", chat_input.message)
         # --- ADDED: Log incoming pending state --- 
-        print(f"--- State at request start: ai_optimizer.pending_swap_context = {ai_optimizer.pending_swap_context} ---") 
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("--- State at request start: ai_optimizer.pending_swap_context = %s ---", ai_optimizer.pending_swap_context)
 
         # --- State Management Logic --- 
         intent = None
@@ -37,26 +97,21 @@ async def workout_chat(
         
         # Check for pending swap context
         if ai_optimizer.pending_swap_context and ai_optimizer.pending_swap_context.get("type") == "EXERCISE_SWAP":
-            print("--- Pending exercise swap context found. Attempting to handle as SUGGESTION_IMPLEMENT. ---")
+            log.debug("--- Pending exercise swap context found. Attempting to handle as SUGGESTION_IMPLEMENT. ---")
             # Assume intent is SUGGESTION_IMPLEMENT
             intent = "SUGGESTION_IMPLEMENT"
             # Extract chosen alternative from the current message (basic logic)
-            chosen_alternative_title = None
             message_lower = user_message.lower()
-            suggestions = ai_optimizer.pending_swap_context.get('suggestions', [])
-            for sugg in suggestions:
-                 sugg_title = sugg.get('name')
-                 if sugg_title and sugg_title.lower() in message_lower:
-                     chosen_alternative_title = sugg_title
-                     break
-            # Fallback regex (similar to the one in AIWorkoutOptimizer)
+            # Single scan of the message for any of the suggested titles
+            chosen_alternative_title = ai_optimizer.match_pending_suggestion(message_lower)
+            # Fallback regex (the same one AIWorkoutOptimizer uses)
             if not chosen_alternative_title:
-                 chosen_match = re.search(r"(?:use|with|go with|choose|select)\s+([\w\s\(\)-]+)", user_message, re.IGNORECASE)
+                 chosen_match = _CHOSEN_ALT_RE.search(user_message)
                  if chosen_match:
                      chosen_alternative_title = chosen_match.group(1).strip()
             
             if chosen_alternative_title:
-                 print(f"--- Router extracted chosen alternative: '{chosen_alternative_title}' ---")
+                 log.debug("--- Router extracted chosen alternative: '%s' ---", chosen_alternative_title)
                  # Populate context directly using stored + extracted info
                  context = {
                      "routine_id": ai_optimizer.pending_swap_context.get('routine_id'),
@@ -66,66 +121,41 @@ async def workout_chat(
                  }
                  # Skip normal intent classification and context gathering
             else:
-                 print("--- Could not extract choice from user message while swap context was pending. Falling back to classification. ---")
+                 log.debug("--- Could not extract choice from user message while swap context was pending. Falling back to classification. ---")
                  # Clear the pending context as the user message seems unrelated
                  ai_optimizer.pending_swap_context = None
                  intent = None # Reset intent so normal classification runs
         
         # --- Normal Intent Classification Flow (if no pending action handled) --- 
         if intent is None: 
-            print("--- No pending action found or handled, proceeding with intent classification. ---")
-            # --- Pass conversation history to classify_intent --- 
-            history = ai_optimizer.get_conversation_history()
-            intent = await intent_service.classify_intent(user_message, conversation_history=history)
-            context = await intent_service.get_relevant_context(intent, user_message)
+            if user_message.strip().lower().rstrip("!.?") in _GREETING_SET:
+                # Plain greetings don't need an LLM classification or any Hevy context
+                intent = "GREETING"
+            else:
+                log.debug("--- No pending action found or handled, proceeding with intent classification. ---")
+                # --- Pass conversation history to classify_intent --- 
+                history = ai_optimizer.get_conversation_history()
+                intent = await intent_service.classify_intent(user_message, conversation_history=history)
+                context = await _get_context(intent_service, intent, user_message)
             # --- If classification results in unrelated intent, clear pending state --- 
             if intent != "SUGGESTION_IMPLEMENT" and ai_optimizer.pending_swap_context:
-                 print(f"--- User provided unrelated intent ('{intent}') while swap was pending. Clearing pending state. ---")
+                 log.debug("--- User provided unrelated intent ('%s') while swap was pending. Clearing pending state. ---", intent)
                  ai_optimizer.pending_swap_context = None
 
         # --- Routing based on intent --- 
-        if intent == "SUGGESTION_IMPLEMENT":
-             # Ensure context is populated (either from state check or potentially intent service - though state check is primary)
-             if not context.get('chosen_alternative_title'):
-                  # Attempt extraction again if missed by state check somehow (shouldn't happen often)
-                  # Or rely on the AIWorkoutOptimizer handler to request clarification
-                  print("--- WARNING: SUGGESTION_IMPLEMENT intent routed, but context missing chosen_alternative_title. Handler needs to cope. ---")
-             print(f"--- Routing to Modification/Action (Intent: {intent}) ---")
-             response_content = await ai_optimizer.get_modification_response(user_message, intent, context)
-             response_data = {"response": response_content, "intent": intent}
-        elif intent == "GREETING":
-            response_content = "Hello! How can I help you with your workouts today?"
-            # No need to call AI optimizer for a simple greeting
-            response_data = {"response": response_content, "intent": intent}
-        elif intent == "UNKNOWN":
-            response_content = "Sorry, I'm not sure how to help with that. Can you please rephrase or ask about your workouts?"
-            # No need to call AI optimizer for unknown intent
-            response_data = {"response": response_content, "intent": intent}
-        elif intent in ["WORKOUT_INFO", "EXERCISE_INFO", "ROUTINE_INFO", "PROGRAM_INFO", "GENERAL_INFO"]:
-            print(f"--- Routing to Information Retrieval (Intent: {intent}) ---")
-            # --- Replace Placeholder with Actual Call ---
-            response_content = await ai_optimizer.get_info_response(user_message, intent, context)
-            response_data = {"response": response_content, "intent": intent}
+        static_response = _STATIC_RESPONSES.get(intent)
+        if static_response is not None:
+            return static_response
 
-        elif intent in ["WORKOUT_ANALYSIS", "PROGRAM_ANALYSIS", "EXERCISE_ANALYSIS", "COMPARATIVE_ANALYSIS"]:
-            print(f"--- Routing to Analysis (Intent: {intent}) ---")
-            # --- Pass chat_input.message to the handler ---
-            response_content = await ai_optimizer.get_analysis_response(user_message, intent, context)
-            response_data = {"response": response_content, "intent": intent}
-
-        elif intent in ["EXERCISE_SWAP", "PROGRAM_CREATE", "ROUTINE_UPDATE", "SUGGESTION_IMPLEMENT"]:
-            print(f"--- Routing to Modification/Action (Intent: {intent}) ---")
-            # --- Replace Placeholder with Actual Call ---
-            response_content = await ai_optimizer.get_modification_response(user_message, intent, context)
-            response_data = {"response": response_content, "intent": intent}
-
-        else:
+        handler = _INTENT_HANDLERS.get(intent)
+        if handler is None:
             # Fallback for any unexpected, non-UNKNOWN intent that wasn't caught by IntentService validation
-            print(f"--- Warning: Unhandled intent '{intent}'. Falling back. ---")
+            log.warning("--- Unhandled intent '%s'. Falling back. ---", intent)
             response_content = "Sorry, I encountered an unexpected situation handling your request."
-            # Attempt fallback using the generic chat method
-            # response_content = await ai_optimizer.chat_about_workout_optimization(chat_input.message, context)
             response_data = {"response": response_content, "intent": "UNKNOWN"} # Ensure intent is UNKNOWN
+        else:
+            response_content = await handler(ai_optimizer, user_message, intent, context)
+            response_data = {"response": response_content, "intent": intent}
 
         # --- Update conversation history using the final response_content ---
         # Only add non-empty user messages and assistant responses
@@ -134,14 +164,12 @@ async def workout_chat(
         if response_content: # Ensure we have a response before adding
             ai_optimizer.conversation_history.append({"role": "assistant", "content": response_content})
 
-        print(f"--- Sending Response: {str(response_data)[:200]}... ---")
+        if log.isEnabledFor(logging.DEBUG): # Skip the full repr of the payload outside DEBUG
+            log.debug("--- Sending Response: %s... ---", str(response_data)[:200])
         return response_data
 
     except Exception as e:
-        print(f"!!! Error in workout_chat endpoint: {e} !!!")
-        # Consider logging the full traceback in production
-        # import traceback
-        # print(traceback.format_exc())
+        log.exception("!!! Error in workout_chat endpoint: %s !!!", e)
         raise HTTPException(
             status_code=500,
             detail=f"An internal error occurred: {str(e)}"
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from ..services.workout_optimizer import WorkoutOptimizer
 from ..services.ai_workout_optimizer import AIWorkoutOptimizer
@@ -12,6 +12,8 @@ router = APIRouter()
 class ChatRequest(BaseModel):
     message: str
 
+    model_config = ConfigDict(extra="ignore", frozen=True, str_strip_whitespace=True)
+
 @router.get("/analysis", response_model=Dict[str, Any])
 async def get_workout_analysis(
     days: int = Query(30, description="Number of days of workout history to analyze"),
@@ -54,6 +56,20 @@ async def get_ai_optimization_insights(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting AI insights: {str(e)}")
 
+@router.get("/ai-insights/multi", response_model=Dict[str, Dict[str, Any]])
+async def get_multi_window_insights(
+    days: List[int] = Query([7, 30], description="History windows (in days) to analyze"),
+    ai_optimizer: AIWorkoutOptimizer = Depends(get_ai_optimizer)
+):
+    """
+    Get AI-enhanced workout optimization insights for several history windows concurrently.
+    """
+    try:
+        insights = await ai_optimizer.get_multi_window_insights(days)
+        return {str(window): result for window, result in insights.items()} # JSON object keys must be strings
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting AI insights: {str(e)}")
+
 @router.post("/chat", response_model=Dict[str, Any])
 async def chat_about_workout_optimization(
     request: ChatRequest = Body(...),
@@ -1,12 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from cachetools import TTLCache, cached
 
 from ..services.hevy_api import HevyAPI
 from ..dependencies import get_hevy_api
 
 router = APIRouter()
 
+@cached(TTLCache(maxsize=64, ttl=60))
+def _start_date(days: int) -> str:
+    """ISO start date for a look-back window, reused for up to a minute per `days` value."""
+    return (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+
 @router.get("/events")
 async def get_workout_events(
     days: int = Query(30, description="Number of days of history to fetch"),
@@ -15,8 +21,7 @@ async def get_workout_events(
     """
     Get workout events for the specified number of days.
     """
-    start_date = (datetime.utcnow() - timedelta(days=days)).isoformat()
-    return await hevy_api.get_workout_events(start_date)
+    return await hevy_api.get_workout_events(_start_date(days))
 
 @router.get("/{workout_id}")
 async def get_workout(
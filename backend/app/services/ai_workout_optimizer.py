@@ -1,14 +1,156 @@
-from typing import Dict, List, Any, Optional, ClassVar
+from typing import Dict, List, Any, Optional, ClassVar, Deque, AsyncIterator, Tuple, Sequence
+from collections import deque, defaultdict
+from itertools import islice
+from operator import itemgetter
 from datetime import datetime, timedelta
 from .workout_optimizer import WorkoutOptimizer
 from .hevy_api import HevyAPI
 import openai
 import os
-import json
+import orjson
 import re # Ensure re is imported if needed for goal extraction
-from serpapi import GoogleSearch # Import SerpApi client
-import traceback
+import httpx
+import logging
 import asyncio # Import asyncio
+from cachetools import LRUCache, TTLCache
+
+log = logging.getLogger(__name__)
+
+def _new_http_clients() -> Tuple[httpx.AsyncClient, openai.AsyncOpenAI]:
+    """
+    Builds the keep-alive HTTP/2 pool shared by the OpenAI and SerpApi calls (so they reuse
+    connections instead of handshaking per call) and the OpenAI client running over it.
+    """
+    http_client = httpx.AsyncClient(
+        http2=True,
+        timeout=30,
+        limits=httpx.Limits(max_keepalive_connections=32)
+    )
+    openai_client = openai.AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        max_retries=2,
+        timeout=30,
+        http_client=http_client
+    )
+    return http_client, openai_client
+
+_shared_http_client, _openai_client = _new_http_clients()
+
+# Comprehensive Markdown formatting instructions appended to every system prompt
+_MARKDOWN_INSTRUCTIONS = """
+        **General Formatting Guidelines:**
+        Your primary goal is to present information clearly, readably, and logically using standard Markdown.
+
+        **Structure & Hierarchy:**
+        *   Use headings (#, ##, ###) appropriately to structure long responses and show hierarchy. Choose heading levels that make sense for the content.
+        *   Use **bold** (`**text**`) for emphasis on key terms, titles within paragraphs, or labels (e.g., `**Workout:** Upper A`).
+        *   Use paragraphs for descriptive text. Ensure adequate spacing between paragraphs (one blank line in Markdown).
+
+        **Lists:**
+        *   Use bullet points (`* ` or `- `) for unordered lists (e.g., listing exercises, sets, recommendations).
+        *   Use numbered lists (`1. `) for sequential steps or ordered items.
+        *   Indent nested lists appropriately.
+
+        **Workout Data Specifics:**
+        *   When displaying details of one or more workouts:
+            *   Clearly indicate the workout title and date (e.g., using a heading or bold text).
+            *   List exercises clearly (e.g., using bold or a sub-heading).
+            *   List sets under each exercise, typically using bullet points (`* Set: [Weight] x [Reps]`).
+        *   When displaying program/routine structure:
+            *   Clearly indicate program/folder names and the routines within them, possibly using nested lists or headings.
+
+        **Readability:**
+        *   **Spacing is crucial!** Add blank lines (press Enter twice in Markdown) between distinct sections, headings, paragraphs, lists, and exercises to improve readability. Avoid large blocks of text packed together.
+        *   Use code blocks (```) for code examples or structured data snippets if appropriate.
+        *   Use blockquotes (>) for important notes or warnings.
+
+        **Overall:** Apply these rules thoughtfully to make the information easy to scan and understand, regardless of whether you are presenting workout data, analysis, general information, or step-by-step instructions. Adapt the specific elements (headings, lists, bolding) to best suit the content being presented in each response.
+        """
+
+# Default system prompt with Markdown formatting
+_DEFAULT_SYSTEM = f"You are a fitness expert AI assistant. {_MARKDOWN_INSTRUCTIONS}"
+
+# Prebuilt system message for calls without a custom prompt; never mutated
+_DEFAULT_SYSTEM_MESSAGE = {"role": "system", "content": _DEFAULT_SYSTEM}
+
+def _compose_system(system_prompt: Optional[str]) -> str:
+    """
+    Returns the system message content. A custom prompt goes after the default one, so every
+    request starts with the same bytes and OpenAI's automatic prompt caching can reuse that prefix.
+    """
+    if system_prompt:
+        return f"{_DEFAULT_SYSTEM}\n\n{system_prompt}"
+    return _DEFAULT_SYSTEM
+
+# Title accessor for cached templates, which always carry the key
+_template_title = itemgetter('title')
+
+# Fallback for picking the chosen alternative out of a free-text reply (e.g. "go with Dips")
+_CHOSEN_ALT_RE = re.compile(r"(?:use|with|go with|choose|select)\s+([\w\s()\-]+)", re.IGNORECASE)
+
+# Phrases that introduce a user's goal; the goal is the rest of the message after the earliest one
+_GOAL_RE = re.compile(r"(?:goal is to|want to|focus on|develop my|improve my|get better at|increase my)\s+(.+)", re.IGNORECASE | re.DOTALL)
+
+# Goal keywords -> Hevy primary muscle groups worth listing for that goal
+_GOAL_MUSCLE_KEYWORDS = {
+    "chest": ("chest", "triceps", "shoulders"),
+    "pec": ("chest", "triceps", "shoulders"),
+    "back": ("lats", "upper_back", "lower_back", "traps", "biceps"),
+    "lat": ("lats", "upper_back", "biceps"),
+    "shoulder": ("shoulders", "traps", "triceps"),
+    "delt": ("shoulders", "traps"),
+    "trap": ("traps", "upper_back", "shoulders"),
+    "arm": ("biceps", "triceps", "forearms"),
+    "bicep": ("biceps", "forearms"),
+    "tricep": ("triceps", "chest", "shoulders"),
+    "forearm": ("forearms", "biceps"),
+    "grip": ("forearms",),
+    "leg": ("quadriceps", "hamstrings", "glutes", "calves", "adductors", "abductors"),
+    "quad": ("quadriceps", "glutes"),
+    "hamstring": ("hamstrings", "glutes", "lower_back"),
+    "glute": ("glutes", "hamstrings", "abductors"),
+    "calf": ("calves",),
+    "calves": ("calves",),
+    "core": ("abdominals", "lower_back"),
+    "abs": ("abdominals",),
+}
+
+# Any goal keyword as a whole word, optionally plural ("lats" but not "flat", "arms" but not "warm")
+_GOAL_MUSCLE_RE = re.compile(r"\b(" + "|".join(map(re.escape, _GOAL_MUSCLE_KEYWORDS)) + r")s?\b", re.IGNORECASE)
+
+def _goal_muscle_groups(user_goal: Optional[str]) -> List[str]:
+    """Returns the muscle groups implied by a goal like "develop my chest", in first-seen order."""
+    if not user_goal:
+        return []
+    muscles = {} # dict keeps insertion order and drops duplicates
+    for match in _GOAL_MUSCLE_RE.finditer(user_goal):
+        muscles.update(dict.fromkeys(_GOAL_MUSCLE_KEYWORDS[match.group(1).lower()]))
+    return list(muscles)
+
+# SerpApi Google search endpoint (JSON); the key is read once since the environment doesn't change at runtime
+_SERPAPI_URL = "https://serpapi.com/search.json"
+_SERPAPI_KEY = os.getenv("SERPAPI_API_KEY")
+
+# Three empty working sets for an exercise swapped into a routine
+_DEFAULT_SETS_TEMPLATE = ({"type": "normal", "weight_kg": None, "reps": None},) * 3
+
+# Per-exercise lines of the insights context, by stat; each insights section picks the ones it needs
+_EXERCISE_CONTEXT_LINES = {
+    "frequency": lambda data: f"- Frequency: {data['frequency']} times",
+    "average_weight": lambda data: f"- Average weight: {data.get('average_weight', 'N/A')} kg",
+    "average_reps": lambda data: f"- Average reps: {data.get('average_reps', 'N/A')}",
+    "progression": lambda data: f"- Progression trend: {data['progression']}",
+}
+
+# Upper bound on the serialized context embedded in generic analysis prompts
+_MAX_CONTEXT_BYTES = 8 * 1024
+
+def _context_json(context: Dict[str, Any]) -> str:
+    """Serializes intent context as compact JSON for a prompt, truncated to _MAX_CONTEXT_BYTES."""
+    payload = orjson.dumps(context, default=str, option=orjson.OPT_NON_STR_KEYS)
+    if len(payload) <= _MAX_CONTEXT_BYTES:
+        return payload.decode()
+    return payload[:_MAX_CONTEXT_BYTES].decode(errors="ignore") + " ...[context truncated]"
 
 class AIWorkoutOptimizer:
     """
@@ -18,6 +160,34 @@ class AIWorkoutOptimizer:
     
     # --- ADDED: Class variable for caching ---
     _cached_templates: ClassVar[Optional[List[Dict]]] = None
+    # Lookup indexes over _cached_templates, rebuilt whenever the cache is loaded
+    _cached_templates_by_title: ClassVar[Dict[str, Dict]] = {}
+    _title_to_muscle: ClassVar[Dict[str, str]] = {}
+    _muscle_to_templates: ClassVar[Dict[str, List[Dict]]] = {}
+    # Compact JSON sample of the cached templates for EXERCISE_INFO prompts, built at load time
+    _templates_sample: ClassVar[Optional[str]] = None
+    # "Available exercises" prompt fragment for program analysis, built at load time
+    _cached_exercise_list_str: ClassVar[Optional[str]] = None
+    # Keep-alive client for outbound calls other than Hevy (OpenAI, SerpApi), and the OpenAI client using it;
+    # shared by every optimizer instance and replaced by aclose_http_client
+    _http_client: ClassVar[httpx.AsyncClient] = _shared_http_client
+    _openai_client: ClassVar[openai.AsyncOpenAI] = _openai_client
+    # Recent SerpApi search context, keyed by normalized user goal
+    _serp_cache: ClassVar[TTLCache] = TTLCache(maxsize=256, ttl=3600)
+    # Guards the cold-start template fetch so concurrent callers don't each hit Hevy
+    _cache_lock: ClassVar[asyncio.Lock] = asyncio.Lock()
+    # Maximum number of user/assistant messages kept in conversation_history
+    MAX_HISTORY_MESSAGES: ClassVar[int] = 40
+    # Number of recent user/assistant turns sent back to the model with each chat request
+    MAX_HISTORY_TURNS: ClassVar[int] = 12
+    # Sections of the optimization insights report, each requested as its own prompt:
+    # section -> (instruction, per-exercise stats the prompt needs, see _EXERCISE_CONTEXT_LINES)
+    _INSIGHT_SECTIONS: ClassVar[Dict[str, Tuple[str, Tuple[str, ...]]]] = {
+        "summary": ("summarize the workout patterns and trends.", ("frequency", "average_weight", "average_reps")),
+        "recommendations": ("give specific exercise recommendations for improvement and overall workout optimization suggestions.", ("average_weight", "average_reps", "progression")),
+        "risks": ("point out areas of concern or potential injury risks.", ("frequency", "progression")),
+        "variety": ("suggest ways to add workout variety and progression.", ("frequency",)),
+    }
 
     def __init__(self, hevy_api: HevyAPI):
         """
@@ -28,28 +198,103 @@ class AIWorkoutOptimizer:
         """
         self.workout_optimizer = WorkoutOptimizer(hevy_api)
         self.hevy_api = hevy_api
-        self.client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.conversation_history = []
+        # Bounded so long sessions don't grow memory or prompt size without limit
+        self.conversation_history: Deque[Dict[str, str]] = deque(maxlen=self.MAX_HISTORY_MESSAGES)
         # --- ADDED: State for pending exercise swap --- 
         self.pending_swap_context: Optional[Dict[str, Any]] = None 
+        # Pre-formatted workout strings for WORKOUT_INFO, keyed by (workout id, updated_at)
+        self._workout_fmt_cache: LRUCache = LRUCache(maxsize=128)
         
     # --- ADDED: Static method to load cache ---
     @staticmethod
     async def load_templates_cache(hevy_api: HevyAPI):
         """Fetches all exercise templates and stores them in the class cache."""
-        if AIWorkoutOptimizer._cached_templates is None:
-            print("--- AIWorkoutOptimizer: Loading exercise templates into cache... ---")
+        # Fast path: once loaded, callers never touch the lock
+        if AIWorkoutOptimizer._cached_templates is not None:
+            log.info("--- AIWorkoutOptimizer: Exercise template cache already loaded. ---")
+            return
+        async with AIWorkoutOptimizer._cache_lock:
+            # Re-check under the lock so concurrent cold-start callers fetch only once
+            if AIWorkoutOptimizer._cached_templates is not None:
+                log.info("--- AIWorkoutOptimizer: Exercise template cache already loaded. ---")
+                return
+            log.info("--- AIWorkoutOptimizer: Loading exercise templates into cache... ---")
             try:
                 # Use the get_all_exercise_templates method which already extracts necessary fields
-                AIWorkoutOptimizer._cached_templates = await hevy_api.get_all_exercise_templates()
-                print(f"--- AIWorkoutOptimizer: Successfully loaded {len(AIWorkoutOptimizer._cached_templates)} templates into cache. ---")
+                templates = await hevy_api.get_all_exercise_templates()
+                log.info("--- AIWorkoutOptimizer: Successfully loaded %s templates into cache. ---", len(templates))
             except Exception as e:
-                print(f"--- AIWorkoutOptimizer: ERROR loading exercise template cache: {e} ---")
-                traceback.print_exc() # Print traceback for cache loading errors
-                AIWorkoutOptimizer._cached_templates = [] # Set empty list on error
-        else:
-            print("--- AIWorkoutOptimizer: Exercise template cache already loaded. ---")
+                log.exception("--- AIWorkoutOptimizer: ERROR loading exercise template cache: %s ---", e)
+                templates = [] # Set empty list on error
+            # Build the indexes before publishing the list, so readers never see one without the other
+            AIWorkoutOptimizer._index_templates(templates)
+            AIWorkoutOptimizer._templates_sample = AIWorkoutOptimizer._dump_templates_sample(templates) if templates else None
+            AIWorkoutOptimizer._cached_exercise_list_str = AIWorkoutOptimizer._format_exercise_list(templates)
+            AIWorkoutOptimizer._cached_templates = templates
         
+    @classmethod
+    def _get_http_client(cls) -> httpx.AsyncClient:
+        """Returns the shared outbound HTTP client."""
+        return cls._http_client
+
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        """The shared OpenAI client."""
+        return self._openai_client
+
+    @classmethod
+    async def aclose_http_client(cls) -> None:
+        """
+        Closes the shared outbound HTTP client (call on app shutdown).
+        Fresh clients are set up in its place, so the app can start again in this process.
+        """
+        await cls._http_client.aclose()
+        cls._http_client, cls._openai_client = _new_http_clients()
+
+    @staticmethod
+    def _format_exercise_list(templates: List[Dict]) -> str:
+        """Bulleted list of template titles for the program analysis prompt."""
+        if not templates:
+            return "None Available"
+        # Limit the list slightly just in case, though should be less of an issue now
+        limit = 500 
+        # Titles are always present (get_all_exercise_templates defaults them to 'Unknown')
+        exercise_list_str = "\n".join([f"- {title}" for title in map(_template_title, templates[:limit])])
+        if len(templates) > limit:
+             return exercise_list_str + "\n... (list truncated)"
+        return exercise_list_str
+
+    @staticmethod
+    def _dump_templates_sample(templates: List[Dict]) -> str:
+        """Compact JSON of the first 10 templates, keeping only the fields the model needs."""
+        sample = [
+            {'title': t.get('title'), 'primary_muscle_group': t.get('primary_muscle_group')}
+            for t in templates[:10]
+        ]
+        return orjson.dumps(sample).decode()
+
+    @staticmethod
+    def _index_templates(templates: List[Dict]):
+        """Builds the title and muscle group lookups used by EXERCISE_SWAP and SUGGESTION_IMPLEMENT."""
+        by_title = {}
+        title_to_muscle = {}
+        muscle_to_templates = defaultdict(list)
+        for template in templates:
+            # get_all_exercise_templates always sets these keys, so subscript directly
+            title = template['title']
+            muscle = template['primary_muscle_group']
+            if title:
+                by_title.setdefault(title, template) # First match wins, as with the old linear scans
+            if not muscle:
+                continue
+            if title:
+                title_to_muscle.setdefault(title, muscle)
+            muscle_to_templates[muscle].append(template)
+        AIWorkoutOptimizer._cached_templates_by_title = by_title
+        AIWorkoutOptimizer._title_to_muscle = title_to_muscle
+        # Muscle groups in sorted order; each bucket keeps fetch order, so swap candidates and goal lists match a scan of the cache
+        AIWorkoutOptimizer._muscle_to_templates = dict(sorted(muscle_to_templates.items()))
+
     async def get_chat_response(self, message: str, system_prompt: Optional[str] = None) -> str:
         """
         Get a response from the AI chat model.
@@ -61,61 +306,30 @@ class AIWorkoutOptimizer:
         Returns:
             The AI's response
         """
-        messages = []
-        
-        # Define the NEW comprehensive Markdown formatting instructions
-        markdown_instructions = """
-        **General Formatting Guidelines:**
-        Your primary goal is to present information clearly, readably, and logically using standard Markdown.
+        return "".join([chunk async for chunk in self.stream_chat_response(message, system_prompt)])
 
-        **Structure & Hierarchy:**
-        *   Use headings (#, ##, ###) appropriately to structure long responses and show hierarchy. Choose heading levels that make sense for the content.
-        *   Use **bold** (`**text**`) for emphasis on key terms, titles within paragraphs, or labels (e.g., `**Workout:** Upper A`).
-        *   Use paragraphs for descriptive text. Ensure adequate spacing between paragraphs (one blank line in Markdown).
-
-        **Lists:**
-        *   Use bullet points (`* ` or `- `) for unordered lists (e.g., listing exercises, sets, recommendations).
-        *   Use numbered lists (`1. `) for sequential steps or ordered items.
-        *   Indent nested lists appropriately.
-
-        **Workout Data Specifics:**
-        *   When displaying details of one or more workouts:
-            *   Clearly indicate the workout title and date (e.g., using a heading or bold text).
-            *   List exercises clearly (e.g., using bold or a sub-heading).
-            *   List sets under each exercise, typically using bullet points (`* Set: [Weight] x [Reps]`).
-        *   When displaying program/routine structure:
-            *   Clearly indicate program/folder names and the routines within them, possibly using nested lists or headings.
-
-        **Readability:**
-        *   **Spacing is crucial!** Add blank lines (press Enter twice in Markdown) between distinct sections, headings, paragraphs, lists, and exercises to improve readability. Avoid large blocks of text packed together.
-        *   Use code blocks (```) for code examples or structured data snippets if appropriate.
-        *   Use blockquotes (>) for important notes or warnings.
-
-        **Overall:** Apply these rules thoughtfully to make the information easy to scan and understand, regardless of whether you are presenting workout data, analysis, general information, or step-by-step instructions. Adapt the specific elements (headings, lists, bolding) to best suit the content being presented in each response.
+    async def stream_chat_response(self, message: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
         """
+        Stream a response from the AI chat model as it is generated.
+        The full response is added to the conversation history once the stream completes.
         
-        # Add system prompt if provided, and always append Markdown instructions
-        if system_prompt:
-            system_content = f"{system_prompt}\n\n{markdown_instructions}"
-            messages.append({
-                "role": "system", 
-                "content": system_content
-            })
-        else:
-            # Default system prompt with Markdown formatting
-            system_content = f"""
-            You are a fitness expert AI assistant. {markdown_instructions}
-            """
-            messages.append({
-                "role": "system", 
-                "content": system_content
-            })
-        
-        # Add conversation history
-        messages.extend(self.conversation_history)
+        Args:
+            message: The user's message
+            system_prompt: Optional system prompt to guide the AI's response
+            
+        Yields:
+            Chunks of the AI's response text
+        """
+        # System prompt (custom or default) always ends with the shared Markdown instructions
+        system_message = {"role": "system", "content": _compose_system(system_prompt)} if system_prompt else _DEFAULT_SYSTEM_MESSAGE
         
-        # Add current message
-        messages.append({"role": "user", "content": message})
+        # System prompt, the most recent conversation history (so prompt size stays flat on long sessions), then the current message
+        history_window = 2 * self.MAX_HISTORY_TURNS
+        messages = [
+            system_message,
+            *islice(self.conversation_history, max(0, len(self.conversation_history) - history_window), None),
+            {"role": "user", "content": message}
+        ]
 
         
         try:
@@ -123,30 +337,52 @@ class AIWorkoutOptimizer:
                 model="gpt-4o-mini",
                 messages=messages,
                 temperature=0.7,
-                max_tokens=1000
+                max_tokens=1000,
+                stream=True
             )
             
-            # Extract the response text
-            response_text = response.choices[0].message.content
- 
-            
-            # Update conversation history
-            self.conversation_history.append({"role": "user", "content": message})
-            self.conversation_history.append({"role": "assistant", "content": response_text})
-            
-            return response_text
+            # Pass each piece of text through as it arrives, keeping a copy for the history
+            response_parts = []
+            async for chunk in response:
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    response_parts.append(text)
+                    yield text
             
         except Exception as e:
-            print(f"Error getting OpenAI response: {str(e)}")
+            log.error("Error getting OpenAI response: %s", e)
             raise
+        
+        # Update conversation history
+        self.conversation_history.append({"role": "user", "content": message})
+        self.conversation_history.append({"role": "assistant", "content": "".join(response_parts)})
             
+    def match_pending_suggestion(self, message_lower: str) -> Optional[str]:
+        """
+        Returns the pending swap suggestion mentioned in a lowercased message, or None.
+        A reply that is exactly a title is a dict hit; otherwise the earliest title in the message wins.
+        """
+        pending_context = self.pending_swap_context or {}
+        suggestions_lower = pending_context.get('suggestions_lower', {})
+        # Users often reply with just the name, so try an exact match before scanning
+        exact = suggestions_lower.get(message_lower.strip(" .!?'\""))
+        if exact:
+            return exact
+        pattern = pending_context.get('suggestions_re')
+        if pattern is None:
+            return None
+        match = pattern.search(message_lower)
+        return suggestions_lower.get(match.group(0)) if match else None
+
     def clear_conversation_history(self):
         """Clear the conversation history"""
-        self.conversation_history = []
+        self.conversation_history.clear()
         
-    def get_conversation_history(self) -> List[Dict[str, str]]:
-        """Get the current conversation history"""
-        return self.conversation_history.copy()
+    def get_conversation_history(self) -> Tuple[Dict[str, str], ...]:
+        """Get a read-only snapshot of the current conversation history"""
+        return tuple(self.conversation_history)
     
     async def get_ai_optimization_insights(self, days: int = 30) -> Dict[str, Any]:
         """
@@ -161,11 +397,8 @@ class AIWorkoutOptimizer:
         # Get basic workout analysis
         workout_analysis = await self.workout_optimizer.analyze_workout_history(days)
         
-        # Prepare context for AI analysis
-        context = self._prepare_ai_context(workout_analysis)
-        
         # Get AI-enhanced insights
-        ai_insights = await self._get_ai_insights(context)
+        ai_insights = await self._get_ai_insights(workout_analysis)
         
         return {
             "workout_analysis": workout_analysis,
@@ -175,66 +408,94 @@ class AIWorkoutOptimizer:
             "summary": ai_insights.get("summary", "")
         }
     
-    def _prepare_ai_context(self, workout_analysis: Dict[str, Any]) -> str:
+    async def get_multi_window_insights(self, windows: Sequence[int] = (7, 30)) -> Dict[int, Dict[str, Any]]:
+        """
+        Get AI-enhanced insights for several history windows at once (e.g. a 7- and 30-day dashboard).
+        Each window's analysis -> AI pipeline runs concurrently with the others.
+        
+        Args:
+            windows: Day counts to analyze
+            
+        Returns:
+            Dict mapping each window to its get_ai_optimization_insights result
+        """
+        results = await asyncio.gather(*(self.get_ai_optimization_insights(days) for days in windows))
+        return dict(zip(windows, results))
+    
+    def _prepare_ai_context(self, workout_analysis: Dict[str, Any], fields: Sequence[str] = tuple(_EXERCISE_CONTEXT_LINES)) -> str:
         """
         Prepare workout analysis data as context for AI.
         
         Args:
             workout_analysis: Basic workout analysis data
+            fields: Per-exercise stats to include (keys of _EXERCISE_CONTEXT_LINES)
             
         Returns:
             Formatted context string for AI analysis
         """
-        context = f"""
+        line_formats = [_EXERCISE_CONTEXT_LINES[field] for field in fields]
+        parts: List[str] = [f"""
         Workout Analysis Summary:
         - Total workouts analyzed: {workout_analysis['total_workouts']}
         - Time period: Last {workout_analysis.get('days', 30)} days
         
         Exercise Analysis:
-        """
+        """]
         
         for exercise_id, data in workout_analysis.get("exercise_analysis", {}).items():
-            context += f"""
+            parts.append(f"""
             Exercise: {data['name']}
-            - Frequency: {data['frequency']} times
-            - Average weight: {data.get('average_weight', 'N/A')} kg
-            - Average reps: {data.get('average_reps', 'N/A')}
-            - Progression trend: {data['progression']}
-            """
+""")
+            parts.extend(f"            {line_format(data)}\n" for line_format in line_formats)
         
-        return context
+        return "".join(parts)
     
-    async def _get_ai_insights(self, context: str) -> Dict[str, Any]:
+    async def _get_ai_insights(self, workout_analysis: Dict[str, Any]) -> Dict[str, Any]:
         """
         Get AI-enhanced insights based on workout analysis.
         
         Args:
-            context: Formatted workout analysis context
+            workout_analysis: Basic workout analysis data
             
         Returns:
             Dict containing AI-generated insights
         """
-        # Prepare the prompt for the AI
-        prompt = f"""
-        Based on the following workout analysis, provide detailed insights and recommendations:
-        
-        {context}
-        
-        Please provide:
-        1. A summary of the workout patterns and trends
-        2. Specific exercise recommendations for improvement
-        3. Overall workout optimization suggestions
-        4. Areas of concern or potential injury risks
-        5. Suggestions for workout variety and progression
-        
-        Format the response as a structured analysis with clear sections.
-        """
+        # Each section is an independent prompt carrying only the stats it needs, so the round trips overlap
+        # and no request pays for the whole analysis.
+        # These go straight to the client (not get_chat_response) so they don't touch conversation history.
+        tasks = [
+            self.client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    _DEFAULT_SYSTEM_MESSAGE,
+                    {"role": "user", "content": f"{self._prepare_ai_context(workout_analysis, fields)}\n\nBased on the workout analysis above, {instruction}"}
+                ],
+                temperature=0.7,
+                max_tokens=300
+            )
+            for instruction, fields in self._INSIGHT_SECTIONS.values()
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
         
-        # Get AI response - no need to pass system prompt as Markdown formatting is handled in get_chat_response
-        response = await self.get_chat_response(prompt)
+        sections = {}
+        for section, result in zip(self._INSIGHT_SECTIONS, results):
+            if isinstance(result, Exception):
+                log.error("--- Error getting AI insights section '%s': %s ---", section, result)
+                continue
+            sections[section] = result.choices[0].message.content or ""
+        if not sections:
+            raise results[0] # Every section failed; surface the error like a single call would
         
         # Parse and structure the AI response
-        return self._parse_ai_response(response)
+        response = "\n\n".join(f"## {section.title()}\n\n{text}" for section, text in sections.items())
+        insights = self._parse_ai_response(response)
+        if "summary" in sections:
+            insights["summary"] = sections["summary"]
+        if "recommendations" in sections:
+            insights["recommendations"] = self._parse_ai_response(sections["recommendations"])["recommendations"]
+        insights["risks"] = sections.get("risks", "")
+        insights["variety"] = sections.get("variety", "")
+        return insights
     
     def _parse_ai_response(self, response: str) -> Dict[str, Any]:
         """
@@ -250,17 +511,55 @@ class AIWorkoutOptimizer:
         # For now, return a basic structure
         return {
             "summary": response[:200] + "...",  # First 200 chars as summary
-            "recommendations": [line.strip() for line in response.split('\n') if line.strip()],
+            "recommendations": [line for line in (raw.strip() for raw in response.splitlines()) if line],
             "exercise_insights": {},  # TODO: Parse exercise-specific insights
             "raw_response": response
         }
     
+    def _format_workout(self, workout: Dict[str, Any]) -> str:
+        """
+        Formats one workout as Markdown for the prompt context.
+        Cached by (id, updated_at), so follow-up questions about the same workout reuse the string.
+        """
+        workout_id = workout.get('id')
+        cache_key = (workout_id, workout.get('updated_at'))
+        if workout_id is not None:
+            cached = self._workout_fmt_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        # Extract just the date part
+        date_str = workout.get('start_time', 'Unknown Date')
+        if date_str:
+             date_str = date_str.partition('T')[0] # No-op when there's no time part
+        workout_header = f"**Workout:** {workout.get('title', 'Unknown')}\n**Date:** {date_str}\n\n" # Added double newline after date
+
+        exercise_strs = []
+        for exercise in workout.get('exercises', []):
+            exercise_header = f"  **{exercise.get('title', 'Unknown Exercise')}**\n" # Indent + Bold
+            set_strs = []
+            for i, set_data in enumerate(exercise.get('sets', [])):
+                weight_lbs = set_data.get('weight_lbs')
+                reps = set_data.get('reps')
+                reps_str = f"{reps} reps" if reps is not None else "N/A reps"
+                # Only show lbs if weight exists
+                weight_str = f"{weight_lbs:.1f} lbs" if weight_lbs is not None and weight_lbs > 0 else "Bodyweight"
+                # Further indent sets with a bullet point
+                set_strs.append(f"    * Set {i+1}: {weight_str} x {reps_str}")
+            exercise_strs.append(exercise_header + "\n".join(set_strs))
+        # Join exercises with double newline for spacing
+        formatted = workout_header + "\n\n".join(exercise_strs)
+
+        if workout_id is not None:
+            self._workout_fmt_cache[cache_key] = formatted
+        return formatted
+
     async def get_info_response(self, message: str, intent: str, context: Dict[str, Any]) -> str:
         """
         Handles intents related to information retrieval using provided context.
         Pre-formats workout details for better presentation.
         """
-        print(f"--- AI Optimizer: Handling Info Intent '{intent}' ---")
+        log.debug("--- AI Optimizer: Handling Info Intent '%s' ---", intent)
         prompt_context = "No specific context was readily available." # Default
 
         # --- Format Context String with Spacing and Indentation ---
@@ -268,43 +567,17 @@ class AIWorkoutOptimizer:
             workout_list_to_format = []
             if 'last_workout' in context:
                 workout_list_to_format = [context['last_workout']]
-                print("--- Formatting single last workout for prompt context ---")
+                log.debug("--- Formatting single last workout for prompt context ---")
             elif 'recent_workouts' in context:
                 # Take up to 3 recent workouts
                 workout_list_to_format = context['recent_workouts'][:3]
-                print(f"--- Formatting {len(workout_list_to_format)} recent workouts for prompt context ---")
+                log.debug("--- Formatting %s recent workouts for prompt context ---", len(workout_list_to_format))
 
             if workout_list_to_format:
-                formatted_workouts = []
-                for workout in workout_list_to_format:
-                    workout_str = f"**Workout:** {workout.get('title', 'Unknown')}\n"
-                    # Extract just the date part
-                    date_str = workout.get('start_time', 'Unknown Date')
-                    if date_str and 'T' in date_str:
-                         date_str = date_str.split('T')[0]
-                    workout_str += f"**Date:** {date_str}\n\n" # Added double newline after date
-
-                    exercise_strs = []
-                    for exercise in workout.get('exercises', []):
-                        exercise_str = f"  **{exercise.get('title', 'Unknown Exercise')}**\n" # Indent + Bold
-                        set_strs = []
-                        for i, set_data in enumerate(exercise.get('sets', [])):
-                            weight_lbs = set_data.get('weight_lbs')
-                            reps = set_data.get('reps')
-                            reps_str = f"{reps} reps" if reps is not None else "N/A reps"
-                            weight_str = "Bodyweight"
-                            if weight_lbs is not None and weight_lbs > 0: # Only show lbs if weight exists
-                                weight_str = f"{weight_lbs:.1f} lbs"
-                            # Further indent sets with a bullet point
-                            set_strs.append(f"    * Set {i+1}: {weight_str} x {reps_str}")
-                        exercise_str += "\n".join(set_strs)
-                        exercise_strs.append(exercise_str)
-                    # Join exercises with double newline for spacing
-                    workout_str += "\n\n".join(exercise_strs)
-                    formatted_workouts.append(workout_str)
+                formatted_workouts = [self._format_workout(workout) for workout in workout_list_to_format]
                 # Join multiple workouts with triple newline for clear separation
                 prompt_context = "\n\n\n".join(formatted_workouts)
-                print("--- Added pre-formatted workout details to prompt context ---") # Updated log
+                log.debug("--- Added pre-formatted workout details to prompt context ---") # Updated log
 
         # --- UPDATED: Handle ROUTINE_INFO context (Limited Formatting) ---
         elif intent == "ROUTINE_INFO":
@@ -312,11 +585,11 @@ class AIWorkoutOptimizer:
                  routines = context['all_routines']
                  if routines:
                     # Just list titles to avoid excessive tokens for now
-                    routine_list = "\n".join([f"- {routine.get('title', 'Unnamed Routine')}" for routine in routines])
+                    routine_list = "\n".join(f"- {routine.get('title', 'Unnamed Routine')}" for routine in routines)
                     prompt_context = f"Context contains the following routines (details require specific parsing not yet implemented):\n{routine_list}"
                  else:
                     prompt_context = "No routines found in the context."
-                 print("--- Added routine title list (placeholder) to prompt context ---")
+                 log.debug("--- Added routine title list (placeholder) to prompt context ---")
              else:
                  prompt_context = "Workout routine data was not found in context."
 
@@ -325,33 +598,35 @@ class AIWorkoutOptimizer:
             if 'routine_folders' in context:
                 folders = context['routine_folders']
                 if folders:
-                    folder_list = "\n".join([f"- {folder.get('title', 'Unnamed Folder')} (ID: {folder.get('id')})" for folder in folders])
+                    folder_list = "\n".join(f"- {folder.get('title', 'Unnamed Folder')} (ID: {folder.get('id')})" for folder in folders)
                     prompt_context = f"Here are your workout programs (folders):\n{folder_list}"
                 else:
                     prompt_context = "You don't seem to have any workout programs (folders) set up yet."
-                print("--- Added routine folder list to prompt context ---")
+                log.debug("--- Added routine folder list to prompt context ---")
             elif 'current_program_folder' in context and 'current_program_routines' in context:
                 folder = context['current_program_folder']
                 routines = context['current_program_routines']
                 folder_title = folder.get('title', 'Unnamed Program')
-                routine_list = "\n".join([f"  - {routine.get('title', 'Unnamed Routine')}" for routine in routines])
+                routine_list = "\n".join(f"  - {routine.get('title', 'Unnamed Routine')}" for routine in routines)
                 prompt_context = f"Your current program seems to be **{folder_title}**. It includes the following routines:\n{routine_list}"
-                print("--- Added current program details to prompt context ---")
+                log.debug("--- Added current program details to prompt context ---")
             else:
                 prompt_context = "Could not find specific program information."
 
         elif intent == "EXERCISE_INFO":
              if 'all_exercise_templates' in context:
                   try:
-                      prompt_context = f"Available Exercise Templates (JSON sample):\n```json\n{json.dumps(context['all_exercise_templates'][:10], indent=2)}\n```"
+                      # Template list is static per process, so reuse the sample built at cache load
+                      templates_sample = AIWorkoutOptimizer._templates_sample or self._dump_templates_sample(context['all_exercise_templates'])
+                      prompt_context = f"Available Exercise Templates (JSON sample):\n```json\n{templates_sample}\n```"
                   except Exception:
                       prompt_context = "Could not format exercise template data."
-                  print(f"--- Added exercise templates JSON to prompt context ---")
+                  log.debug("--- Added exercise templates JSON to prompt context ---")
              else:
                   prompt_context = "Exercise template information was not found."
 
         elif intent == "GENERAL_INFO":
-             print("--- No specific Hevy context needed for GENERAL_INFO ---")
+             log.debug("--- No specific Hevy context needed for GENERAL_INFO ---")
              prompt_context = "The user is asking a general fitness question."
 
         # --- Updated Prompt Instructions ---
@@ -381,52 +656,48 @@ Answer the user's question based primarily on the provided context.
         """
         Handles intents related to analysis.
         """
-        print(f"--- AI Optimizer: Handling Analysis Intent '{intent}' ---")
+        log.debug("--- AI Optimizer: Handling Analysis Intent '%s' ---", intent)
         prompt = ""
         response_content = "" # Initialize response
 
         if intent == "PROGRAM_ANALYSIS":
-            print("--- AI Optimizer: Handling PROGRAM_ANALYSIS ---")
+            log.debug("--- AI Optimizer: Handling PROGRAM_ANALYSIS ---")
             program_analysis_results = context.get("program_analysis_results", {})
             if program_analysis_results:
-                 # If analysis was already in context (future improvement)
+                 # If analysis was already in context (future improvement), return it directly like the on-the-fly path
                  program_name = program_analysis_results.get('program_name', 'Unknown Program')
                  analysis_summary = program_analysis_results.get('analysis', 'No analysis available')
-                 prompt = f"""Context about the user's complete workout program:
-Program Name: {program_name}
-Program Analysis Summary:
-{analysis_summary}
-User's question regarding the program: {message}
-Please provide a detailed, personalized response that addresses the user's question using the provided program analysis."""
-                 response_content = await self.get_chat_response(prompt) # Ask AI to use existing analysis
+                 log.debug("--- Using pre-computed program analysis, returning directly. ---")
+                 response_content = f"# Analysis for: {program_name}\n\n{analysis_summary}"
+                 # --- No second AI call needed here ---
 
             else:
                  # If no pre-computed analysis, try to generate it now
-                 print("--- No pre-computed program analysis found, attempting to analyze now ---")
+                 log.debug("--- No pre-computed program analysis found, attempting to analyze now ---")
                  try:
                      analysis_data = await self.analyze_program(message) # Calls the existing method
                      if analysis_data and "error" not in analysis_data:
                           # --- CHANGE APPLIED HERE: Return analysis directly ---
                           analysis_summary = analysis_data.get('analysis', 'No analysis available')
-                          print("--- Successfully generated analysis, returning directly. ---")
+                          log.debug("--- Successfully generated analysis, returning directly. ---")
                           # We can potentially prepend the program name for clarity
                           program_name = analysis_data.get('program_name', 'Unknown Program')
-                          response_content = f"# Analysis for: {program_name}\\n\\n{analysis_summary}"
+                          response_content = f"# Analysis for: {program_name}\n\n{analysis_summary}"
                           # --- No second AI call needed here ---
                      else:
                           error_msg = analysis_data.get("error", "Unknown error during analysis")
-                          print(f"--- Error generating program analysis on the fly: {error_msg} ---")
+                          log.error("--- Error generating program analysis on the fly: %s ---", error_msg)
                           # Inform user about the error
                           response_content = f"I tried to analyze the program but encountered an error: {error_msg}."
                  except Exception as e:
-                     print(f"--- Exception during on-the-fly program analysis: {e} ---")
+                     log.exception("--- Exception during on-the-fly program analysis: %s ---", e)
                      # Inform user about the internal error
                      response_content = "I encountered an internal error while trying to analyze the program. Please try again later."
 
         else:
             # Handle other analysis intents (WORKOUT_ANALYSIS, EXERCISE_ANALYSIS, etc.)
             # These will likely still need an AI call based on context
-            prompt = f"User asked for analysis (Intent: {intent}): '{message}'. Context: {str(context)}. Perform the requested analysis."
+            prompt = f"User asked for analysis (Intent: {intent}): '{message}'. Context: {_context_json(context)}. Perform the requested analysis."
             response_content = await self.get_chat_response(prompt)
 
         # Return the determined response content
@@ -436,7 +707,7 @@ Please provide a detailed, personalized response that addresses the user's quest
         """
         Handles intents related to modifications and actions.
         """
-        print(f"--- AI Optimizer: Handling Modification Intent '{intent}' ---")
+        log.debug("--- AI Optimizer: Handling Modification Intent '%s' ---", intent)
         # TODO: Implement logic for different modification intents
         # For EXERCISE_SWAP, PROGRAM_CREATE, ROUTINE_UPDATE:
         #   - Prepare prompt for AI to confirm or plan the change
@@ -446,7 +717,7 @@ Please provide a detailed, personalized response that addresses the user's quest
         #   - Call HevyAPI to implement the change
         
         if intent == "EXERCISE_SWAP":
-            print("--- Handling EXERCISE_SWAP intent ---")
+            log.debug("--- Handling EXERCISE_SWAP intent ---")
             # --- Retrieve context --- 
             exercise_to_swap_name = context.get("exercise_name")
             target_routine = context.get("target_routine_details") # Contains ID, title, exercises list etc.
@@ -454,11 +725,11 @@ Please provide a detailed, personalized response that addresses the user's quest
 
             if not exercise_to_swap_name:
                  # Handle case where exercise name wasn't extracted
-                 print("--- ERROR: Exercise name not found in context for EXERCISE_SWAP ---")
+                 log.error("--- ERROR: Exercise name not found in context for EXERCISE_SWAP ---")
                  prompt = "I understood you want to swap an exercise, but I couldn't identify which one from your message. Could you please specify the exercise name again?"
                  return await self.get_chat_response(prompt)
 
-            print(f"--- User wants to swap: '{exercise_to_swap_name}' in routine '{routine_name}' ---")
+            log.debug("--- User wants to swap: '%s' in routine '%s' ---", exercise_to_swap_name, routine_name)
 
             # --- Find Alternatives using Cached Templates --- 
             potential_swaps = []
@@ -466,38 +737,43 @@ Please provide a detailed, personalized response that addresses the user's quest
             cached_templates = AIWorkoutOptimizer._cached_templates
 
             if not cached_templates:
-                 print("--- WARNING: Exercise template cache is empty. Cannot find alternatives. ---")
+                 log.warning("--- WARNING: Exercise template cache is empty. Cannot find alternatives. ---")
                  # Fallback prompt if cache is empty
                  prompt = f"I understand you want to swap '{exercise_to_swap_name}', but I'm having trouble accessing the list of available exercises right now. Please try again later."
                  return await self.get_chat_response(prompt)
 
+            # Limit suggestions to avoid overwhelming user
+            max_suggestions = 5
+
             # 1. Find the muscle group of the exercise to swap
-            for template in cached_templates:
-                if template.get('title') == exercise_to_swap_name:
-                    exercise_to_swap_muscle = template.get('primary_muscle_group')
-                    print(f"--- Found muscle group for '{exercise_to_swap_name}': {exercise_to_swap_muscle} ---")
-                    break
+            exercise_to_swap_muscle = AIWorkoutOptimizer._title_to_muscle.get(exercise_to_swap_name)
+            if exercise_to_swap_muscle:
+                log.debug("--- Found muscle group for '%s': %s ---", exercise_to_swap_name, exercise_to_swap_muscle)
 
             # 2. Find other exercises with the same primary muscle group
             if exercise_to_swap_muscle:
-                for template in cached_templates:
-                    if template.get('primary_muscle_group') == exercise_to_swap_muscle and \
-                       template.get('title') != exercise_to_swap_name: # Exclude the original exercise
-                        potential_swaps.append({
-                            'name': template.get('title'),
-                            'id': template.get('id'),
-                            'muscles': template.get('primary_muscle_group') # Keep for consistency
-                        })
-                print(f"--- Found {len(potential_swaps)} potential swaps targeting {exercise_to_swap_muscle} (excluding original) ---")
+                # Single pass over the bucket that stops as soon as enough candidates are found
+                same_muscle = islice(
+                    (template for template in AIWorkoutOptimizer._muscle_to_templates.get(exercise_to_swap_muscle, [])
+                     if template['title'] != exercise_to_swap_name), # Exclude the original exercise
+                    max_suggestions
+                )
+                potential_swaps = [
+                    {
+                        'name': template.get('title'),
+                        'id': template.get('id'),
+                        'muscles': template.get('primary_muscle_group') # Keep for consistency
+                    }
+                    for template in same_muscle
+                ]
+                log.debug("--- Found %s potential swaps targeting %s (excluding original) ---", len(potential_swaps), exercise_to_swap_muscle)
             else:
-                print(f"--- WARNING: Could not find primary muscle group for '{exercise_to_swap_name}'. Cannot suggest muscle-group based alternatives. ---")
+                log.warning("--- WARNING: Could not find primary muscle group for '%s'. Cannot suggest muscle-group based alternatives. ---", exercise_to_swap_name)
                 # Could add fallback logic here, e.g., suggest generic popular exercises?
 
             # --- Construct Prompt with REAL Alternatives --- 
             if potential_swaps:
-                # Limit suggestions to avoid overwhelming user
-                max_suggestions = 5
-                suggestions_to_show = potential_swaps[:max_suggestions]
+                suggestions_to_show = potential_swaps
                 
                 # Format each swap
                 formatted_list_items = [
@@ -519,40 +795,51 @@ Please let me know which one you'd like to use. If none of these seem right, tel
             else: # Could not find original exercise/muscle group
                 prompt = f"I understand you want to swap '{exercise_to_swap_name}' in your '{routine_name}' routine, but I couldn't find that specific exercise in my database to determine its muscle group. Could you confirm the spelling or perhaps suggest a type of exercise you're looking for as an alternative?"
 
-            print("--- Prompt for EXERCISE_SWAP (using real alternatives) ---")
-            print(prompt)
-            print("-------------------------------------------------------------")
+            if log.isEnabledFor(logging.DEBUG): # One check for the whole prompt dump
+                log.debug("--- Prompt for EXERCISE_SWAP (using real alternatives) ---\n%s\n-------------------------------------------------------------", prompt)
             response = await self.get_chat_response(prompt)
 
             # --- ADDED: Store context for potential SUGGESTION_IMPLEMENT next turn --- 
             if target_routine and exercise_to_swap_name and potential_swaps:
+                # Lowercased title -> title (first suggestion wins on duplicates)
+                suggestions_lower = {}
+                for sugg in suggestions_to_show:
+                    if sugg['name']:
+                        suggestions_lower.setdefault(sugg['name'].lower(), sugg['name'])
                 self.pending_swap_context = {
                     "type": "EXERCISE_SWAP", # Indicate the type of pending action
                     "routine_id": target_routine.get('id'),
                     "routine_name": routine_name, # Store for user messages
                     "exercise_to_swap_title": exercise_to_swap_name,
                     "suggestions": suggestions_to_show, # Store the actual suggestions shown
+                    # Lowercased titles, so matching the user's reply doesn't re-lowercase every title
+                    "suggestions_lower": suggestions_lower,
+                    # One pattern for all titles, so the reply is scanned once; longest first so "Weighted Dips" beats "Dips"
+                    "suggestions_re": re.compile("|".join(
+                        re.escape(low) for low in sorted(suggestions_lower, key=len, reverse=True)
+                    )) if suggestions_lower else None,
                     # --- ADDED: Store current exercises from the fetched routine --- 
-                    "current_exercises": target_routine.get('exercises', [])
+                    # Copied: the routine comes from HevyAPI's shared listing cache and the swap edits these in place
+                    "current_exercises": [dict(exercise) for exercise in target_routine.get('exercises', [])]
                 }
-                print(f"--- Stored pending swap context: {self.pending_swap_context} ---")
+                log.debug("--- Stored pending swap context: %s ---", self.pending_swap_context)
             else:
                  # Clear any stale context if we couldn't provide suggestions
                  self.pending_swap_context = None
-                 print("--- Cleared pending swap context due to missing info/suggestions. ---")
+                 log.debug("--- Cleared pending swap context due to missing info/suggestions. ---")
 
             # --- ADDED: Log final state before returning --- 
-            print(f"--- EXERCISE_SWAP block finishing. Final pending context: {self.pending_swap_context} ---")
+            log.debug("--- EXERCISE_SWAP block finishing. Final pending context: %s ---", self.pending_swap_context)
             return response
             
         elif intent == "SUGGESTION_IMPLEMENT":
              # --- Phase 3: Implement the suggested exercise swap --- 
-             print("--- Handling SUGGESTION_IMPLEMENT intent (Exercise Swap) ---")
+             log.debug("--- Handling SUGGESTION_IMPLEMENT intent (Exercise Swap) ---")
              
              # --- UPDATED: Use stored pending context and extract choice from message --- 
              pending_context = self.pending_swap_context
              if not pending_context or pending_context.get("type") != "EXERCISE_SWAP":
-                 print("--- ERROR: No valid pending exercise swap context found for SUGGESTION_IMPLEMENT. ---")
+                 log.error("--- ERROR: No valid pending exercise swap context found for SUGGESTION_IMPLEMENT. ---")
                  prompt = "I'm sorry, I don't have a pending exercise swap suggestion active. Could you please restate your initial swap request?"
                  self.pending_swap_context = None # Clear any invalid state
                  return await self.get_chat_response(prompt)
@@ -561,68 +848,58 @@ Please let me know which one you'd like to use. If none of these seem right, tel
              routine_id = pending_context.get('routine_id')
              exercise_to_swap_title = pending_context.get('exercise_to_swap_title')
              routine_name = pending_context.get('routine_name', 'the routine')
-             suggestions = pending_context.get('suggestions', []) # Get the list of suggestions
 
              # Extract chosen alternative title from the *current* user message
              # Use a helper function or IntentService method if needed
              # For now, basic extraction (needs improvement)
-             chosen_alternative_title = None
-             message_lower = message.lower()
              # Check if any suggestion title is mentioned
-             for sugg in suggestions:
-                 sugg_title = sugg.get('name')
-                 if sugg_title and sugg_title.lower() in message_lower:
-                     chosen_alternative_title = sugg_title
-                     print(f"--- Matched chosen alternative '{chosen_alternative_title}' from message. ---")
-                     break
+             chosen_alternative_title = self.match_pending_suggestion(message.lower())
+             if chosen_alternative_title:
+                 log.debug("--- Matched chosen alternative '%s' from message. ---", chosen_alternative_title)
              # Simple fallback checks if no direct match
              if not chosen_alternative_title:
                  # Placeholder: Use context extraction from IntentService or similar
                  temp_context = {} # Create temp dict for context extraction call
-                 chosen_match = re.search(r"(?:use|with|go with|choose|select)\s+([\w\s\(\)-]+)", message, re.IGNORECASE)
+                 chosen_match = _CHOSEN_ALT_RE.search(message)
                  if chosen_match:
                      chosen_alternative_title = chosen_match.group(1).strip()
-                     print(f"--- Extracted potential chosen alternative: '{chosen_alternative_title}' (regex fallback) ---")
+                     log.debug("--- Extracted potential chosen alternative: '%s' (regex fallback) ---", chosen_alternative_title)
                  else:
-                     print("--- WARNING: Could not reliably extract chosen alternative from message for SUGGESTION_IMPLEMENT. ---")
+                     log.warning("--- WARNING: Could not reliably extract chosen alternative from message for SUGGESTION_IMPLEMENT. ---")
                      prompt = f"Sorry, I couldn't figure out which exercise you wanted to use from your message ('{message}'). Please clearly state the name of the exercise from the list I provided."
                      # DO NOT clear pending_swap_context here, let user try again
                      return await self.get_chat_response(prompt)
 
              # --- Input Validation ---
              if not all([routine_id, exercise_to_swap_title, chosen_alternative_title]):
-                 print(f"--- ERROR: Missing context for SUGGESTION_IMPLEMENT after extraction. Need routine_id, exercise_to_swap_title, chosen_alternative_title. Context: {pending_context}, Chosen: {chosen_alternative_title} ---")
+                 log.error("--- ERROR: Missing context for SUGGESTION_IMPLEMENT after extraction. Need routine_id, exercise_to_swap_title, chosen_alternative_title. Context: %s, Chosen: %s ---", pending_context, chosen_alternative_title)
                  prompt = "I'm sorry, I seem to have lost some details for the swap. Could you please state the swap again? (e.g., 'swap X for Y in routine Z')"
                  self.pending_swap_context = None # Clear invalid state
                  return await self.get_chat_response(prompt)
 
-             print(f"--- Attempting to swap '{exercise_to_swap_title}' with '{chosen_alternative_title}' in routine ID {routine_id} ('{routine_name}') ---")
+             log.debug("--- Attempting to swap '%s' with '%s' in routine ID %s ('%s') ---", exercise_to_swap_title, chosen_alternative_title, routine_id, routine_name)
 
              try:
                  # 2. Find the chosen alternative template in the cache
                  chosen_template = None
                  cached_templates = AIWorkoutOptimizer._cached_templates
                  if not cached_templates:
-                     print("--- ERROR: Exercise template cache is empty for SUGGESTION_IMPLEMENT. ---")
+                     log.error("--- ERROR: Exercise template cache is empty for SUGGESTION_IMPLEMENT. ---")
                      prompt = f"I found your request to use '{chosen_alternative_title}', but I'm having trouble accessing the exercise database right now to make the change. Please try again later."
                      return await self.get_chat_response(prompt)
 
-                 for template in cached_templates:
-                     if template.get('title') == chosen_alternative_title:
-                         chosen_template = template
-                         break
+                 chosen_template = AIWorkoutOptimizer._cached_templates_by_title.get(chosen_alternative_title)
                  
                  if not chosen_template:
-                      print(f"--- ERROR: Could not find template for chosen alternative '{chosen_alternative_title}' in cache. ---")
+                      log.error("--- ERROR: Could not find template for chosen alternative '%s' in cache. ---", chosen_alternative_title)
                       prompt = f"I'm sorry, I couldn't find the details for '{chosen_alternative_title}' in the exercise database. Perhaps the name is slightly different?"
                       return await self.get_chat_response(prompt)
                  
-                 print(f"--- Found template for chosen alternative: {chosen_template} ---")
+                 log.debug("--- Found template for chosen alternative: %s ---", chosen_template)
                  chosen_template_id = chosen_template.get('id')
                  if not chosen_template_id:
-                      print(f"--- ERROR: Found template for '{chosen_alternative_title}' but it has no ID! Template: {chosen_template} ---")
+                      log.error("--- ERROR: Found template for '%s' but it has no ID! Template: %s ---", chosen_alternative_title, chosen_template)
                       prompt = f"I found '{chosen_alternative_title}' but there seems to be an issue with its data (missing ID). I can't add it to the routine right now."
-                      self.pending_swap_context = None # Clear state on error
                       return await self.get_chat_response(prompt)
 
                  # 3. Fetch the *current* state of the routine
@@ -635,74 +912,62 @@ Please let me know which one you'd like to use. If none of these seem right, tel
                  # Use the exercises list stored during the suggestion phase
                  current_exercises = pending_context.get('current_exercises')
                  if current_exercises is None: # Check if it was missing/null
-                     print(f"--- ERROR: current_exercises list not found in pending context {pending_context}. Cannot perform swap. ---")
+                     log.error("--- ERROR: current_exercises list not found in pending context %s. Cannot perform swap. ---", pending_context)
                      raise ValueError("Missing exercise list from stored context.")
                  
-                 print(f"--- Using stored exercise list. Current routine has {len(current_exercises)} exercises. ---")
-
-                 # 4. Create the updated exercise list
-                 updated_exercises = []
-                 swap_performed = False
-
-                 for i, exercise in enumerate(current_exercises):
-                     if exercise.get('title') == exercise_to_swap_title:
-                         print(f"--- Found exercise '{exercise_to_swap_title}' at index {i} to replace. ---")
-                         swap_performed = True
-                         # Create the new exercise object based on the chosen template
-                         new_exercise = {
-                             "title": chosen_alternative_title,
-                             "notes": None, # Default notes
-                             "exercise_template_id": chosen_template_id,
-                             "superset_id": None, # Assume not part of superset for now
-                             "sets": [
-                                 {"type": "normal", "weight_kg": None, "reps": None}, 
-                                 {"type": "normal", "weight_kg": None, "reps": None},
-                                 {"type": "normal", "weight_kg": None, "reps": None}
-                             ]
-                         }
-                         updated_exercises.append(new_exercise)
-                     else:
-                         # Keep the existing exercise, removing the index field if present
-                         exercise.pop('index', None) # Remove index if it exists
-                         updated_exercises.append(exercise)
+                 log.debug("--- Using stored exercise list. Current routine has %s exercises. ---", len(current_exercises))
+
+                 # 4. Find the exercise to replace (first match, as before)
+                 swap_index = next((i for i, exercise in enumerate(current_exercises) if exercise.get('title') == exercise_to_swap_title), -1)
+                 swap_performed = swap_index >= 0
                  
                  # Re-check if swap actually happened
                  if not swap_performed:
-                     print(f"--- ERROR: Did not find exercise '{exercise_to_swap_title}' in the current routine state for {routine_id}. Cannot perform swap. ---")
+                     log.error("--- ERROR: Did not find exercise '%s' in the current routine state for %s. Cannot perform swap. ---", exercise_to_swap_title, routine_id)
                      prompt = f"I looked for '{exercise_to_swap_title}' in your '{routine_name}' routine to swap it, but I couldn't find it there anymore. Has it been changed or removed recently?"
-                     self.pending_swap_context = None # Clear state
                      return await self.get_chat_response(prompt)
+
+                 log.debug("--- Found exercise '%s' at index %s to replace. ---", exercise_to_swap_title, swap_index)
+                 # Create the new exercise object based on the chosen template
+                 new_exercise = {
+                     "title": chosen_alternative_title,
+                     "notes": None, # Default notes
+                     "exercise_template_id": chosen_template_id,
+                     "superset_id": None, # Assume not part of superset for now
+                     "sets": [dict(s) for s in _DEFAULT_SETS_TEMPLATE] # Fresh copies; the payload is sent as-is
+                 }
+                 # Swap in place; the stored list is only used for this update, and the pending state is cleared below
+                 current_exercises[swap_index] = new_exercise
+                 # The API rejects the read-only index field, so strip it from the kept exercises in one pass
+                 for exercise in current_exercises:
+                     exercise.pop('index', None)
                      
                  # 5. Construct the update payload
                  update_payload = {
                      "routine": {
                          "title": routine_name, # Use stored routine_name
-                         "exercises": updated_exercises
+                         "exercises": current_exercises
                      }
                  }
 
                  # 6. Call Hevy API to update the routine
-                 print(f"--- Calling update_routine for ID {routine_id} with {len(updated_exercises)} exercises... ---")
+                 log.debug("--- Calling update_routine for ID %s with %s exercises... ---", routine_id, len(current_exercises))
                  update_response = await self.hevy_api.update_routine(routine_id, update_payload)
-                 print(f"--- Update routine API response: {update_response} ---") # Log response
+                 log.debug("--- Update routine API response: %s ---", update_response) # Log response
 
                  # 7. Generate confirmation response
                  # TODO: Check update_response for actual success indicator if API provides one
                  prompt = f"Okay, I've updated your '{routine_name}' routine. I've replaced '{exercise_to_swap_title}' with '{chosen_alternative_title}'."
 
              except Exception as e:
-                 print(f"--- ERROR during SUGGESTION_IMPLEMENT swap execution: {e} ---")
-                 traceback.print_exc() # Log detailed error traceback
+                 log.exception("--- ERROR during SUGGESTION_IMPLEMENT swap execution: %s ---", e)
                  prompt = f"I encountered an error while trying to update the '{routine_name}' routine. I couldn't swap '{exercise_to_swap_title}' for '{chosen_alternative_title}'. Please try again later or check the routine in the app."
-                 # --- ADDED: Clear state on error --- 
-                 self.pending_swap_context = None 
 
-             # --- ADDED: Clear state on success --- 
-             # (Assuming the API call section ends before this)
-             # We should clear the state regardless of API success/failure, as the action was attempted.
+             # Single cleanup point for every exit from the try block (success, early return, or error):
+             # we clear the state regardless of API success/failure, as the action was attempted.
              finally:
                   self.pending_swap_context = None
-                  print("--- Cleared pending swap context after handling SUGGESTION_IMPLEMENT. ---")
+                  log.debug("--- Cleared pending swap context after handling SUGGESTION_IMPLEMENT. ---")
 
              # Send final response to user
              response = await self.get_chat_response(prompt)
@@ -710,7 +975,7 @@ Please let me know which one you'd like to use. If none of these seem right, tel
 
         else:
             # Fallback for other/unimplemented modification intents
-            print(f"--- Handling modification intent '{intent}' with fallback logic ---")
+            log.debug("--- Handling modification intent '%s' with fallback logic ---", intent)
             prompt = f"User requested a modification (Intent: {intent}): '{message}'. Context: {str(context)}. This specific modification isn't fully implemented yet. Please explain the general steps you *would* take to help the user with this type of request (e.g., asking for details, confirming changes), but state clearly that you cannot perform the action automatically right now."
             response = await self.get_chat_response(prompt) 
             return response
@@ -722,9 +987,9 @@ Please let me know which one you'd like to use. If none of these seem right, tel
          or could be used for very general, non-specific chat if needed.]
         """
         try:
-            print("\n===== START: chat_about_workout_optimization [Refactored Fallback] =====")
-            print(f"User message: {user_message}")
-            print(f"Context provided: {context}") # Context here is likely from IntentService now
+            log.debug("===== START: chat_about_workout_optimization [Refactored Fallback] =====")
+            log.debug("User message: %s", user_message)
+            log.debug("Context provided: %s", context) # Context here is likely from IntentService now
 
             # Simplified fallback logic - provide minimal context
             context_summary = "No specific context provided for this general chat."
@@ -737,16 +1002,14 @@ User's message (seems general or fallback): {user_message}
 
 Please provide a helpful, general response related to workout optimization or ask clarifying questions if the request is unclear."""
 
-            print("\nSending simplified fallback prompt to AI...")
+            log.debug("Sending simplified fallback prompt to AI...")
             response = await self.get_chat_response(prompt)
-            print(f"Received response: {response[:100]}...")
-            print("\n===== END: chat_about_workout_optimization [Refactored Fallback] =====\n")
+            log.debug("Received response: %s...", response[:100])
+            log.debug("===== END: chat_about_workout_optimization [Refactored Fallback] =====")
             return response
 
         except Exception as e:
-            print(f"\n❌ Error in refactored chat_about_workout_optimization: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error in refactored chat_about_workout_optimization: %s", e)
             return f"I encountered an error processing this request. Error: {str(e)}"
 
     async def analyze_program(self, user_message: str) -> Dict[str, Any]:
@@ -759,23 +1022,23 @@ Please provide a helpful, general response related to workout optimization or as
         Returns:
             Dict containing program analysis
         """
-        print("--- AI Optimizer: analyze_program() called ---")
+        log.debug("--- AI Optimizer: analyze_program() called ---")
         try:
             # Fetch program details
-            print("--- analyze_program: Fetching program details... ---")
+            log.debug("--- analyze_program: Fetching program details... ---")
             current_program_details = await self.hevy_api.get_current_program_details()
             
             # --- CORRECTED: Check cache and use it, remove redundant fetch --- 
             # REMOVED: all_templates = await self.hevy_api.get_all_exercise_templates()
 
             if AIWorkoutOptimizer._cached_templates is None:
-                print("--- analyze_program: WARNING - Template cache not loaded, attempting fallback load ---")
+                log.warning("--- analyze_program: WARNING - Template cache not loaded, attempting fallback load ---")
                 await AIWorkoutOptimizer.load_templates_cache(self.hevy_api)
                 # If fallback fails, _cached_templates will be []
 
             # Use the value FROM the cache
             all_templates = AIWorkoutOptimizer._cached_templates if AIWorkoutOptimizer._cached_templates is not None else []
-            print(f"--- analyze_program: Using {len(all_templates)} cached exercise templates. ---")
+            log.debug("--- analyze_program: Using %s cached exercise templates. ---", len(all_templates))
             # --- END CORRECTION --- 
 
             if not current_program_details:
@@ -792,7 +1055,7 @@ Please provide a helpful, general response related to workout optimization or as
             
             # --- Extract user goal --- 
             user_goal = self._extract_user_goal(user_message)
-            print(f"--- analyze_program: Extracted User goal: {user_goal} ---")
+            log.debug("--- analyze_program: Extracted User goal: %s ---", user_goal)
 
             # Get the structured analysis from the AI
             ai_analysis_response = await self._get_program_analysis(program_context_str, all_templates, user_goal)
@@ -806,13 +1069,11 @@ Please provide a helpful, general response related to workout optimization or as
                 "analysis": ai_analysis_response.get("analysis_text", "AI analysis not available"), 
                 # "recommendations": ai_analysis_response.get("recommendations", []), # Might be part of analysis_text
             }
-            print(f"--- Program Analysis Complete for: {final_analysis['program_name']} ---")
+            log.debug("--- Program Analysis Complete for: %s ---", final_analysis['program_name'])
             return final_analysis
 
         except Exception as e:
-            print(f"Error during program analysis: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error during program analysis: %s", e)
             return {"error": f"Failed to analyze program: {str(e)}"}
 
     def _prepare_program_context(self, folder: Dict[str, Any], routines: List[Dict[str, Any]]) -> str:
@@ -826,44 +1087,54 @@ Please provide a helpful, general response related to workout optimization or as
         Returns:
             Formatted context string for AI analysis
         """
-        context = f"""
+        parts: List[str] = [f"""
         Program Analysis:
         Name: {folder.get('title', 'Unknown Program')}
         Total Routines: {len(routines)}
         
         Routine Structure:
-        """
+        """]
         
+        append = parts.append
+        get_ranges = self._get_ranges
         for routine in routines:
-            context += f"""
+            append(f"""
             Routine: {routine.get('title', 'Unknown')}
             Exercises:
-            """
+            """)
             
             for exercise in routine.get('exercises', []):
                 sets_info = exercise.get('sets', [])
-                context += f"""
+                rep_range, weight_range = get_ranges(sets_info)
+                append(f"""
                 - {exercise.get('title', 'Unknown Exercise')}
                   Sets: {len(sets_info)}
-                  Rep Range: {self._get_rep_range(sets_info)}
-                  Weight Range: {self._get_weight_range(sets_info)}
-                """
+                  Rep Range: {rep_range}
+                  Weight Range: {weight_range}
+                """)
         
-        return context
-
-    def _get_rep_range(self, sets: List[Dict[str, Any]]) -> str:
-        """Get the rep range from a list of sets."""
-        reps = [s.get('reps') for s in sets if s.get('reps') is not None]
-        if not reps:
-            return "N/A"
-        return f"{min(reps)}-{max(reps)}"
-
-    def _get_weight_range(self, sets: List[Dict[str, Any]]) -> str:
-        """Get the weight range from a list of sets."""
-        weights = [s.get('weight_kg') for s in sets if s.get('weight_kg') is not None]
-        if not weights:
-            return "Bodyweight/N/A"
-        return f"{min(weights):.1f}kg-{max(weights):.1f}kg"
+        return "".join(parts)
+
+    def _get_ranges(self, sets: List[Dict[str, Any]]) -> Tuple[str, str]:
+        """Get the rep range and weight range from a list of sets in a single pass."""
+        rep_min = rep_max = weight_min = weight_max = None
+        for s in sets:
+            get = s.get
+            reps = get('reps')
+            if reps is not None:
+                if rep_min is None or reps < rep_min:
+                    rep_min = reps
+                if rep_max is None or reps > rep_max:
+                    rep_max = reps
+            weight = get('weight_kg')
+            if weight is not None:
+                if weight_min is None or weight < weight_min:
+                    weight_min = weight
+                if weight_max is None or weight > weight_max:
+                    weight_max = weight
+        rep_range = "N/A" if rep_min is None else f"{rep_min}-{rep_max}"
+        weight_range = "Bodyweight/N/A" if weight_min is None else f"{weight_min:.1f}kg-{weight_max:.1f}kg"
+        return rep_range, weight_range
 
     async def _get_program_analysis(self, program_context_str: str, available_exercises: List[Dict], user_goal: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -879,22 +1150,29 @@ Please provide a helpful, general response related to workout optimization or as
         """
         
         web_search_context = ""
-        serpapi_key = os.getenv("SERPAPI_API_KEY")
+        serpapi_key = _SERPAPI_KEY
+        # Search results for a goal are stable for a while, so reuse recent ones
+        goal_key = user_goal.strip().lower() if user_goal else None
+        cached_search_context = AIWorkoutOptimizer._serp_cache.get(goal_key) if goal_key and serpapi_key else None
         
-        if user_goal and serpapi_key:
+        if cached_search_context is not None:
+            log.debug("--- Reusing cached SerpApi results for goal: '%s' ---", user_goal)
+            web_search_context = cached_search_context
+        elif user_goal and serpapi_key:
             # --- Perform Web Search using SerpApi --- 
             search_query = f"recommendations for {user_goal} with upper lower split program structure"
-            print(f"--- Performing SerpApi search (async wrapper) for goal: '{user_goal}' with query: '{search_query}' ---")
+            log.debug("--- Performing SerpApi search for goal: '%s' with query: '%s' ---", user_goal, search_query)
             try:
                 params = {
+                    "engine": "google", # GoogleSearch used to set this for us
                     "q": search_query,
                     "api_key": serpapi_key,
                     "num": 3 # Request top 3 results
                 }
-                search = GoogleSearch(params)
-                # --- UPDATED: Run synchronous blocking call in a thread --- 
-                results = await asyncio.to_thread(search.get_dict)
-                # --- END UPDATE --- 
+                # Call the SerpApi REST endpoint directly on the event loop (no worker thread)
+                response = await self._get_http_client().get(_SERPAPI_URL, params=params)
+                response.raise_for_status()
+                results = response.json()
                 
                 organic_results = results.get("organic_results", [])
                 
@@ -905,30 +1183,37 @@ Please provide a helpful, general response related to workout optimization or as
                 
                 if results_str:
                     web_search_context = f"\n\nWeb Search Results for \"{search_query}\":\n{results_str}"
-                    print(f"--- SerpApi search successful. Added {len(organic_results[:3])} result snippets to context. ---")
+                    log.debug("--- SerpApi search successful. Added %s result snippets to context. ---", len(organic_results[:3]))
                 else:
                      web_search_context = "\n\nWeb search via SerpApi returned no relevant organic results."
-                     print("--- SerpApi search returned no organic results. ---")
+                     log.debug("--- SerpApi search returned no organic results. ---")
+                # Only successful searches are cached; errors are retried next time
+                AIWorkoutOptimizer._serp_cache[goal_key] = web_search_context
                      
             except Exception as e:
-                print(f"--- SerpApi search failed: {e} ---")
+                log.warning("--- SerpApi search failed: %s ---", e)
                 # Optionally log more details about the error e
                 web_search_context = "\n\nWeb search could not be performed due to an error." 
         elif user_goal and not serpapi_key:
-             print("--- Skipping web search: SERPAPI_API_KEY not found in environment. ---")
+             log.debug("--- Skipping web search: SERPAPI_API_KEY not found in environment. ---")
              web_search_context = "\n\nWeb search skipped: API key not configured."
 
         # --- Prepare list of available exercises for the prompt --- 
-        exercise_list_str = "None Available"
-        if available_exercises:
-            # Extract titles from the list of dicts
-            exercise_titles = [ex.get('title', 'Unknown') for ex in available_exercises]
-            # Limit the list slightly just in case, though should be less of an issue now
-            limit = 500 
-            if len(exercise_titles) > limit:
-                 exercise_list_str = "\n".join([f"- {title}" for title in exercise_titles[:limit]]) + "\n... (list truncated)"
-            else:
-                 exercise_list_str = "\n".join([f"- {title}" for title in exercise_titles])
+        # For a goal that names body parts, only list exercises for the related muscle groups
+        goal_templates = []
+        if available_exercises is AIWorkoutOptimizer._cached_templates:
+            goal_templates = [
+                template
+                for muscle in _goal_muscle_groups(user_goal)
+                for template in AIWorkoutOptimizer._muscle_to_templates.get(muscle, [])
+            ]
+        if goal_templates:
+            exercise_list_str = self._format_exercise_list(goal_templates)
+            log.debug("--- Limited available exercises to %s goal-related templates. ---", len(goal_templates))
+        elif available_exercises is AIWorkoutOptimizer._cached_templates and AIWorkoutOptimizer._cached_exercise_list_str is not None:
+            exercise_list_str = AIWorkoutOptimizer._cached_exercise_list_str # Built once at cache load
+        else:
+            exercise_list_str = self._format_exercise_list(available_exercises)
         
         # --- Construct the Detailed Prompt --- 
         prompt = f"""You are an expert fitness coach analyzing a user's workout program. 
@@ -959,10 +1244,10 @@ Instructions:
 5.  Be concise but thorough in your explanation of the changes.
 """
         
-        print("--- Sending detailed analysis prompt to AI... ---")
+        log.debug("--- Sending detailed analysis prompt to AI... ---")
         # Get AI response - Markdown formatting is handled by get_chat_response
         response_text = await self.get_chat_response(prompt) 
-        print("--- Received analysis response from AI. ---")
+        log.debug("--- Received analysis response from AI. ---")
         
         # TODO: Parse the response into sections? For now, return raw text.
         # We are returning the raw response text which should be formatted by the AI according to instructions.
@@ -980,7 +1265,7 @@ Instructions:
         # Kept for now, but the logic above returns the raw response.
         """Parse the AI program analysis response into structured data.""" 
         # TODO: Implement more sophisticated parsing if needed later
-        print("--- (_parse_program_analysis called - currently returning raw response) ---")
+        log.debug("--- (_parse_program_analysis called - currently returning raw response) ---")
         return {
             # "overview": response[:200] + "...",
             # "structure_analysis": "Program structure analysis...",
@@ -992,46 +1277,13 @@ Instructions:
 
     # --- ADDED: Helper to extract goal from message --- 
     def _extract_user_goal(self, message: str) -> Optional[str]:
-        """Attempts to extract a user's stated goal from their message (using simple find)."""
-        message_lower = message.lower()
-        keywords = [
-            "goal is to ", 
-            "want to ", 
-            "focus on ", 
-            "develop my ", 
-            "improve my ", 
-            "get better at ", 
-            "increase my "
-        ]
-        
-        for keyword in keywords:
-            index = message_lower.find(keyword)
-            if index != -1:
-                # Extract text after the keyword
-                start_index = index + len(keyword)
-                # --- UPDATED: Strip quotes as well --- 
-                goal = message[start_index:].strip(" .!?\'\"") # Extract from original message, strip punctuation/quotes
-                # Basic length check
-                if 0 < len(goal) < 100:
-                    return goal
-        
+        """Attempts to extract a user's stated goal from their message (single regex scan)."""
+        match = _GOAL_RE.search(message)
+        if not match:
+            return None
+        # --- UPDATED: Strip quotes as well --- 
+        goal = match.group(1).strip(" .!?\'\"") # Extract from original message, strip punctuation/quotes
+        # Basic length check
+        if 0 < len(goal) < 100:
+            return goal
         return None
-
-    def _parse_ai_response(self, response: str) -> Dict[str, Any]:
-        """
-        Parse the AI response into structured data.
-        
-        Args:
-            response: Raw AI response text
-            
-        Returns:
-            Structured dictionary of insights
-        """
-        # TODO: Implement more sophisticated parsing of AI response
-        # For now, return a basic structure
-        return {
-            "summary": response[:200] + "...",  # First 200 chars as summary
-            "recommendations": [line.strip() for line in response.split('\n') if line.strip()],
-            "exercise_insights": {},  # TODO: Parse exercise-specific insights
-            "raw_response": response
-        } 
\ No newline at end of file
@@ -1,16 +1,114 @@
 import os
-import requests
+import time
+import functools
+import random
 import asyncio
+import logging
 import httpx
-import traceback
-from typing import Optional, Dict, Any, List, TypedDict
+import orjson
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import chain
+from cachetools import TTLCache
+from typing import Optional, Dict, Any, List, TypedDict, Callable, Awaitable, Iterable, AsyncIterator, Tuple, Container
 from dotenv import load_dotenv
 from ..core.config import get_settings
 
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
 KG_TO_LBS = 2.20462 # Conversion Factor
 
+# Largest pageSize the Hevy API accepts on its pageSize-paginated endpoints (routines, folders, templates)
+MAX_PAGE_SIZE = 10
+
+# Concurrent page requests allowed per HevyAPI instance when fetching every page of a listing
+MAX_CONCURRENT_PAGES = 10
+# Statuses worth retrying (rate limited / transient gateway errors) and how many times
+RETRYABLE_STATUSES = frozenset({429, 502, 503, 504})
+MAX_REQUEST_RETRIES = 3
+# Upper bound on a server-requested Retry-After wait, so one request can't stall for minutes
+MAX_RETRY_AFTER_SECONDS = 30.0
+# Requests per second allowed to Hevy per HevyAPI instance (bursts up to this many are let through at once)
+MAX_REQUESTS_PER_SECOND = 10
+
+# Byte budget for cached GET response bodies per HevyAPI instance (least recently used evicted first)
+RESPONSE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+# Seconds a cached response is served without revalidation; exercise templates are close to immutable
+TEMPLATE_CACHE_TTL = 24 * 60 * 60
+EXERCISE_CACHE_TTL = 60
+ROUTINE_FOLDER_CACHE_TTL = 60
+# Seconds the merged routine / folder listings are reused by the lookup helpers (cleared on writes)
+ROUTINE_LISTING_CACHE_TTL = 60
+
+def _annotate_weights_lbs(workouts: Iterable[Dict[str, Any]]) -> None:
+    """Adds weight_lbs (None when weight_kg is None) to every set of the given workouts, in place."""
+    k = KG_TO_LBS # Local lookup in the innermost loop
+    for workout in workouts:
+        for exercise in workout.get("exercises", ()):
+            for set_data in exercise.get("sets", ()):
+                weight_kg = set_data.get("weight_kg")
+                set_data['weight_lbs'] = None if weight_kg is None else weight_kg * k
+
+async def _raise_on_error(response: httpx.Response) -> None:
+    """
+    Client response hook: raise HTTPStatusError for 4xx/5xx.
+    Unlike response.raise_for_status() this lets 3xx through, which _cached_get relies on for 304s.
+    """
+    if response.is_error:
+        await response.aread() # Hooks run before the body is read; load it so the error text can be logged
+        response.raise_for_status()
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Seconds to wait before retrying: the server's Retry-After (in seconds) if given, else jittered exponential backoff."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), MAX_RETRY_AFTER_SECONDS)
+        except ValueError:
+            pass # HTTP-date form; fall back to backoff
+    return 2 ** attempt + random.random()
+
+class _TokenBucket:
+    """Async token bucket: at most `rate` acquisitions per `period` seconds, waiting only when empty."""
+
+    def __init__(self, rate: float, period: float = 1.0):
+        self._capacity = rate
+        self._tokens = rate
+        self._fill_rate = rate / period
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock() # Waiters queue here in arrival order
+
+    async def __aenter__(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._fill_rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._fill_rate)
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+@dataclass(slots=True)
+class _Page:
+    """Items and pagination fields of one raw Hevy list response, read from the payload once."""
+    items: List[Dict[str, Any]]
+    page: int
+    page_count: int
+
+    @classmethod
+    def parse(cls, raw: Dict[str, Any], items_key: str, requested_page: int) -> "_Page":
+        return cls(raw.get(items_key, []), raw.get("page", requested_page), raw.get("page_count", 1))
+
+    @property
+    def has_more(self) -> bool:
+        return self.page < self.page_count
+
 class PaginatedResponse(TypedDict):
     """Type definition for paginated API responses"""
     data: List[Dict[str, Any]]
@@ -18,6 +116,7 @@ class PaginatedResponse(TypedDict):
     page: int
     limit: int
     has_more: bool
+    page_count: int
 
 class HevyAPI:
     """
@@ -37,7 +136,253 @@ class HevyAPI:
             "api-key": self.api_key,
             "Accept": "application/json"
         }
-        self.client = httpx.AsyncClient(headers=self.headers)
+        self._open()
+        # (endpoint, params) -> (etag, body, expires_at, size), see _cached_get
+        self._response_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._response_cache_bytes = 0
+        # Merged "routines" / "routine_folders" listings, see _cached_listing
+        self._listing_cache: TTLCache = TTLCache(maxsize=8, ttl=ROUTINE_LISTING_CACHE_TTL)
+
+    def _open(self) -> None:
+        """Creates the HTTP client and the event-loop-bound primitives that pace it."""
+        # One long-lived pool per instance; HTTP/2 multiplexes the concurrent page fetches over few connections.
+        # Sized a little above MAX_CONCURRENT_PAGES, and every connection may stay alive so none is re-handshaked.
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            http2=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=20, keepalive_expiry=30.0),
+            timeout=httpx.Timeout(10.0, connect=5.0),
+            event_hooks={"response": [_raise_on_error]} # Every call raises on 4xx/5xx; see _send for retries and logging
+        )
+        # Bounds the pages fetched at once by _fetch_all_pages to stay inside Hevy's rate limits
+        self._page_semaphore = asyncio.Semaphore(MAX_CONCURRENT_PAGES)
+        # Paces every outgoing request (see _send) instead of fixed sleeps between calls
+        self._limiter = _TokenBucket(MAX_REQUESTS_PER_SECOND)
+        # (endpoint, params) -> task of the GET currently refreshing that entry, so concurrent callers share it
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+        # Running get_all_exercise_templates crawl, shared by concurrent callers
+        self._all_templates_task: Optional[asyncio.Task] = None
+        # Make concurrent misses of a _cached_listing single-flight
+        self._listing_locks = {"routines": asyncio.Lock(), "routine_folders": asyncio.Lock()}
+
+    async def aclose(self) -> None:
+        """
+        Closes the underlying HTTP client (call on app shutdown).
+        A fresh client is set up in its place, so the shared instance keeps working if the app starts again in this process.
+        """
+        await self.client.aclose()
+        self._open()
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        json: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        retries: int = MAX_REQUEST_RETRIES,
+        expected_statuses: Container[int] = ()
+    ) -> httpx.Response:
+        """
+        Send one request to the Hevy API and return the raw response.
+
+        429s are retried after the server's Retry-After, or with jittered exponential
+        backoff when it sends none; 502-504 are retried too,
+        except for POSTs, where the first attempt may already have created the resource.
+        JSON bodies are encoded with orjson. Failures (4xx/5xx raised by the client
+        hook, network errors) are logged and re-raised; statuses in expected_statuses,
+        which the caller handles (e.g. a 404 probe), are logged at DEBUG instead of ERROR.
+        """
+        if json is not None:
+            content = orjson.dumps(json)
+            headers = {**headers, "Content-Type": "application/json"} if headers else {"Content-Type": "application/json"}
+        else:
+            content = None
+        url = f"{self.BASE_URL}{endpoint}"
+        for attempt in range(retries + 1):
+            try:
+                async with self._limiter:
+                    return await self.client.request(method, url, params=params, content=content, headers=headers)
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code
+                retryable = status == 429 or (status in RETRYABLE_STATUSES and method != "POST")
+                if not retryable or attempt == retries:
+                    level = logging.DEBUG if status in expected_statuses else logging.ERROR
+                    log.log(level, "Hevy %s %s failed with %s: %s", method, endpoint, status, e.response.text)
+                    raise
+                delay = _retry_delay(e.response, attempt)
+            except httpx.RequestError:
+                log.exception("Hevy %s %s failed", method, endpoint)
+                raise
+            log.debug("Hevy %s %s returned %s, retrying in %.1fs", method, endpoint, status, delay)
+            await asyncio.sleep(delay)
+
+    async def _request_json(
+        self,
+        method: str,
+        endpoint: str,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        json: Any = None,
+        retries: int = MAX_REQUEST_RETRIES
+    ) -> Any:
+        """
+        Send a request to the Hevy API and return the decoded JSON body (None when empty).
+
+        Raises httpx.HTTPStatusError / httpx.RequestError after logging them.
+        """
+        response = await self._send(method, endpoint, params=params, json=json, retries=retries)
+        content = response.content
+        return orjson.loads(content) if content else None
+
+    async def _cached_get(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        ttl: float = EXERCISE_CACHE_TTL,
+        expected_statuses: Container[int] = ()
+    ) -> Any:
+        """
+        GET a JSON endpoint through the in-process response cache.
+
+        Entries younger than ttl are returned without a request. Stale entries are
+        revalidated with If-None-Match, so an unchanged resource costs a body-less 304.
+        Concurrent misses for the same key share one request. Raises
+        httpx.HTTPStatusError like a direct call (see _send for expected_statuses). The returned body is shared
+        with the cache and must not be mutated.
+        """
+        key = (endpoint, tuple(sorted(params.items())) if params else ())
+        entry = self._response_cache.get(key)
+        if entry is not None:
+            self._response_cache.move_to_end(key)
+            if entry[2] > time.monotonic():
+                return entry[1]
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._refresh_cached(key, endpoint, params, ttl, expected_statuses))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one cancelled caller doesn't cancel the request the others are waiting on
+        return await asyncio.shield(task)
+
+    async def _refresh_cached(
+        self,
+        key: tuple,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        ttl: float,
+        expected_statuses: Container[int] = ()
+    ) -> Any:
+        """Fetches (or revalidates) one _cached_get entry and stores the result."""
+        cache = self._response_cache
+        entry = cache.get(key)
+        headers = {"If-None-Match": entry[0]} if entry is not None and entry[0] else None
+        response = await self._send("GET", endpoint, params=params, headers=headers, expected_statuses=expected_statuses)
+        if response.status_code == 304 and entry is not None:
+            etag, body, _, size = entry
+        else:
+            etag, body, size = response.headers.get("ETag"), orjson.loads(response.content), len(response.content)
+        # Re-read the entry: it may have been evicted or invalidated while the request was in flight
+        stale = cache.pop(key, None)
+        if stale is not None:
+            self._response_cache_bytes -= stale[3]
+        if size <= RESPONSE_CACHE_MAX_BYTES:
+            cache[key] = (etag, body, time.monotonic() + ttl, size)
+            self._response_cache_bytes += size
+            while self._response_cache_bytes > RESPONSE_CACHE_MAX_BYTES:
+                _, evicted = cache.popitem(last=False)
+                self._response_cache_bytes -= evicted[3]
+        return body
+
+    def _invalidate_cached(self, endpoint: str) -> None:
+        """Drops every cached response for the endpoint (e.g. after writing to it)."""
+        for key in [key for key in self._response_cache if key[0] == endpoint]:
+            self._response_cache_bytes -= self._response_cache.pop(key)[3]
+
+    async def _cached_listing(
+        self,
+        name: str,
+        fetch_page: Callable[[int], Awaitable[Dict[str, Any]]],
+        first: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns every item of a paginated listing, reusing the merged list for ROUTINE_LISTING_CACHE_TTL.
+        The list and its dicts are shared with the cache and must not be mutated.
+        fetch_page must raise on failure: the listing is stored only once every page has been fetched.
+        first is an already-fetched page 1 to crawl from, if the caller has one.
+        """
+        listing = self._listing_cache.get(name)
+        if listing is None:
+            async with self._listing_locks[name]:
+                listing = self._listing_cache.get(name) # Filled while we waited for the lock?
+                if listing is None:
+                    listing = await self._fetch_all_pages(fetch_page, first)
+                    self._listing_cache[name] = listing
+        return listing
+
+    async def _all_routines(self, first: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """All routines, cached briefly (see _cached_listing)."""
+        return await self._cached_listing("routines", lambda page: self._get_routines_page(MAX_PAGE_SIZE, page), first)
+
+    async def _all_routine_folders(self) -> List[Dict[str, Any]]:
+        """All routine folders, cached briefly (see _cached_listing)."""
+        return await self._cached_listing("routine_folders", lambda page: self.get_routine_folders(limit=MAX_PAGE_SIZE, page=page))
+
+    async def _routines_by_folder(self) -> Dict[Optional[str], List[Dict[str, Any]]]:
+        """The cached routine listing grouped by folder_id, built in one pass and cached alongside it."""
+        index = self._listing_cache.get("routines_by_folder")
+        if index is None:
+            index = {}
+            for routine in await self._all_routines():
+                index.setdefault(routine.get("folder_id"), []).append(routine)
+            self._listing_cache["routines_by_folder"] = index
+        return index
+
+    async def _routines_by_title(self, first: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+        """The cached routine listing keyed by exact title (first routine wins, as in a scan), cached alongside it."""
+        index = self._listing_cache.get("routines_by_title")
+        if index is None:
+            index = {}
+            for routine in await self._all_routines(first):
+                index.setdefault(routine.get("title"), routine)
+            self._listing_cache["routines_by_title"] = index
+        return index
+
+    def invalidate_routines(self) -> None:
+        """Drops the cached routine and folder listings (and their indexes); called after every routine or folder write."""
+        self._listing_cache.clear()
+
+    async def _fetch_page(self, fetch_page: Callable[[int], Awaitable[Dict[str, Any]]], page: int) -> Dict[str, Any]:
+        """Fetches one page under the page semaphore (retries on 429 happen in _send)."""
+        async with self._page_semaphore:
+            return await fetch_page(page)
+
+    async def _gather_pages(
+        self,
+        fetch_page: Callable[[int], Awaitable[Dict[str, Any]]],
+        first: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetches every page of a paginated listing and returns the page responses in order.
+
+        Page 1 is fetched first to learn page_count (unless the caller passes it in as
+        first); the remaining pages are then requested concurrently.
+        """
+        if first is None:
+            first = await self._fetch_page(fetch_page, 1)
+        page_count = first.get("page_count", 1)
+        rest = await asyncio.gather(*(self._fetch_page(fetch_page, page) for page in range(2, page_count + 1)))
+        return [first, *rest]
+
+    async def _fetch_all_pages(
+        self,
+        fetch_page: Callable[[int], Awaitable[Dict[str, Any]]],
+        first: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Fetches every page of a paginated listing and returns the items of all pages, in page order."""
+        pages = await self._gather_pages(fetch_page, first)
+        return list(chain.from_iterable(response.get("data", ()) for response in pages))
     
     async def get_workouts(self, limit: int = 10, page: int = 1) -> Dict[str, Any]:
         """
@@ -55,42 +400,22 @@ class HevyAPI:
                 - limit: Items per page
                 - has_more: Whether there are more pages
         """
-        try:
-            response = requests.get(
-                f"{self.BASE_URL}/workouts",
-                headers=self.headers,
-                params={"limit": limit, "page": page}
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            # Transform response to match our standard format
-            workouts = data.get("workouts", [])
-
-            # --- Add lbs Conversion ---
-            for workout in workouts:
-                for exercise in workout.get("exercises", []):
-                    for set_data in exercise.get("sets", []):
-                        weight_kg = set_data.get("weight_kg")
-                        if weight_kg is not None:
-                            set_data['weight_lbs'] = weight_kg * KG_TO_LBS
-                        else:
-                            # Explicitly set to None if kg is None
-                            set_data['weight_lbs'] = None
-            # --- End Conversion ---
+        data = await self._request_json("GET", "/workouts", params={"limit": limit, "page": page})
 
-            return {
-                "data": workouts[:limit],  # Ensure we don't return more than requested
-                "total": data.get("total", len(workouts)),
-                "page": data.get("page", page),
-                "limit": limit,
-                "has_more": page < data.get("page_count", 1)
-            }
-        except requests.exceptions.RequestException as e:
-            print(f"Error details: {str(e)}")
-            if hasattr(e.response, 'text'):
-                print(f"Response body: {e.response.text}")
-            raise
+        # Transform response to match our standard format
+        parsed = _Page.parse(data, "workouts", page)
+        workouts = parsed.items
+
+        _annotate_weights_lbs(workouts)
+
+        return {
+            "data": workouts,
+            "total": data.get("total", len(workouts)),
+            "page": parsed.page,
+            "limit": limit,
+            "has_more": page < parsed.page_count,
+            "page_count": parsed.page_count
+        }
 
     async def get_all_workouts(self) -> List[Dict[str, Any]]:
         """
@@ -99,25 +424,28 @@ class HevyAPI:
         Returns:
             List of all workout data
         """
-        all_workouts = []
-        page = 1
         limit = 100  # Use a larger limit to minimize API calls
-        
+        return await self._fetch_all_pages(lambda page: self.get_workouts(limit=limit, page=page))
+
+    async def iter_workouts(self, limit: int = 10) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream all workouts page by page, prefetching the next page while the caller
+        consumes the current one. Useful when the caller can stop early or process
+        workouts incrementally; get_all_workouts is faster when everything is needed.
+        """
+        response = await self.get_workouts(limit=limit, page=1)
         while True:
-            response = await self.get_workouts(limit=limit, page=page)
-            workouts = response.get("workouts", [])
-            if not workouts:
-                break
-                
-            all_workouts.extend(workouts)
-            
-            if page >= response.get("page_count", 1):
-                break
-                
-            page += 1
-            await asyncio.sleep(1)  # Rate limiting delay
-            
-        return all_workouts
+            next_task = asyncio.create_task(self.get_workouts(limit=limit, page=response["page"] + 1)) if response["has_more"] else None
+            try:
+                for workout in response["data"]:
+                    yield workout
+            except BaseException: # Caller stopped early (GeneratorExit) or threw in; drop the prefetch
+                if next_task is not None:
+                    next_task.cancel()
+                raise
+            if next_task is None:
+                return
+            response = await next_task
 
     # --- REFACTORED: Use httpx --- 
     async def get_routines(self, limit: int = 10, page: int = 1) -> PaginatedResponse:
@@ -125,36 +453,31 @@ class HevyAPI:
         Fetch user's workout routines with pagination using httpx.
         Uses pageSize parameter.
         """
-        page_size = min(limit, 10) # Assuming 10 is max based on other endpoints
-        print(f"--- HevyAPI (httpx): Fetching routines page {page} with pageSize {page_size} ---")
+        page_size = min(limit, MAX_PAGE_SIZE)
+        log.debug("--- HevyAPI (httpx): Fetching routines page %s with pageSize %s ---", page, page_size)
         try:
-            response = await self.client.get(
-                f"{self.BASE_URL}/routines",
-                params={"pageSize": page_size, "page": page}
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            routines = data.get("routines", [])
-            page_count = data.get("page_count", 1)
-            current_page = data.get("page", page)
-            total_routines = page_count * page_size # Approximation
-            
-            return {
-                "data": routines,
-                "total": total_routines,
-                "page": current_page,
-                "limit": page_size,
-                "has_more": current_page < page_count
-            }
-        except httpx.HTTPStatusError as e:
-            print(f"HTTP error fetching routines: {e.response.status_code} - {e.response.text}")
+            return await self._get_routines_page(page_size, page)
+        except httpx.HTTPError: # Already logged by _send
             return {"data": [], "total": 0, "page": page, "limit": page_size, "has_more": False}
-        except Exception as e:
-            print(f"Error fetching routines (httpx): {str(e)}")
-            traceback.print_exc()
+        except Exception:
+            log.exception("Error fetching routines page %s", page)
             return {"data": [], "total": 0, "page": page, "limit": page_size, "has_more": False}
 
+    async def _get_routines_page(self, page_size: int, page: int) -> PaginatedResponse:
+        """One page of routines for get_routines; unlike it, raises on failure so a crawl never merges a partial listing."""
+        data = await self._request_json("GET", "/routines", params={"pageSize": page_size, "page": page})
+
+        parsed = _Page.parse(data, "routines", page)
+
+        return {
+            "data": parsed.items,
+            "total": parsed.page_count * page_size, # Approximation
+            "page": parsed.page,
+            "limit": page_size,
+            "has_more": parsed.has_more,
+            "page_count": parsed.page_count
+        }
+
     async def get_all_routines(self) -> List[Dict[str, Any]]:
         """
         Fetch all routines by automatically handling pagination.
@@ -162,20 +485,7 @@ class HevyAPI:
         Returns:
             List of all routine data
         """
-        all_routines = []
-        page = 1
-        limit = 10  # Use API max limit
-        
-        while True:
-            response = await self.get_routines(limit=limit, page=page)
-            all_routines.extend(response["data"])
-            
-            if not response["has_more"]:
-                break
-                
-            page += 1
-            
-        return all_routines
+        return list(await self._all_routines()) # Copy, so callers can't reorder the cached listing
 
     async def get_exercises(self, limit: int = 100, page: int = 1) -> PaginatedResponse:
         """
@@ -194,30 +504,20 @@ class HevyAPI:
                 - has_more: Whether there are more pages
         """
         try:
-            response = requests.get(
-                f"{self.BASE_URL}/exercises",
-                headers=self.headers,
-                params={"limit": limit, "page": page}
-            )
-            response.raise_for_status()
-            data = response.json()
+            data = await self._cached_get("/exercises", {"limit": limit, "page": page}, EXERCISE_CACHE_TTL)
             
             # Standardize pagination logic
-            current_page = data.get("page", page)
-            page_count = data.get("page_count", 1) # Assume page_count is returned
-            has_more_calculated = current_page < page_count
+            parsed = _Page.parse(data, "data", page)
 
             return {
-                "data": data.get("data", []),
+                "data": parsed.items,
                 "total": data.get("total", 0), # Or estimate as page_count * limit
-                "page": current_page,
+                "page": parsed.page,
                 "limit": data.get("limit", limit),
-                "has_more": has_more_calculated
+                "has_more": parsed.has_more,
+                "page_count": parsed.page_count
             }
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching exercises: {str(e)}") # Added context to error msg
-            if hasattr(e.response, 'text'):
-                print(f"Response body: {e.response.text}")
+        except httpx.HTTPError: # Already logged by _send
             # Return empty response on error
             return {"data": [], "total": 0, "page": page, "limit": limit, "has_more": False}
 
@@ -228,20 +528,8 @@ class HevyAPI:
         Returns:
             List of all exercise data
         """
-        all_exercises = []
-        page = 1
         limit = 100  # Use a larger limit to minimize API calls
-        
-        while True:
-            response = await self.get_exercises(limit=limit, page=page)
-            all_exercises.extend(response["data"])
-            
-            if not response["has_more"]:
-                break
-                
-            page += 1
-            
-        return all_exercises
+        return await self._fetch_all_pages(lambda page: self.get_exercises(limit=limit, page=page))
 
     async def get_workout(self, workout_id: str) -> Dict[str, Any]:
         """
@@ -253,32 +541,20 @@ class HevyAPI:
         Returns:
             Dict containing detailed workout information
         """
-        try:
-            response = requests.get(
-                f"{self.BASE_URL}/workouts/{workout_id}",
-                headers=self.headers
-            )
-            response.raise_for_status()
-            workout = response.json()
-
-            # --- Add lbs Conversion ---
-            if workout: # Check if workout data exists
-                for exercise in workout.get("exercises", []):
-                    for set_data in exercise.get("sets", []):
-                        weight_kg = set_data.get("weight_kg")
-                        if weight_kg is not None:
-                            set_data['weight_lbs'] = weight_kg * KG_TO_LBS
-                        else:
-                            set_data['weight_lbs'] = None
-            # --- End Conversion ---
-
-            return workout
-        except requests.exceptions.RequestException as e:
-            print(f"Error details: {str(e)}")
-            if hasattr(e.response, 'text'):
-                print(f"Response body: {e.response.text}")
-            raise
-    
+        workout = await self._request_json("GET", f"/workouts/{workout_id}")
+
+        if workout: # Check if workout data exists
+            _annotate_weights_lbs((workout,))
+
+        return workout
+
+    async def get_workouts_bulk(self, workout_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch several workouts concurrently, in the order given.
+        Prefer this over awaiting get_workout in a loop; requests are still paced by the rate limiter.
+        """
+        return await asyncio.gather(*(self.get_workout(workout_id) for workout_id in workout_ids))
+
     async def update_workout(self, workout_id: str, workout_data: Dict) -> Dict:
         """
         Update an existing workout.
@@ -290,51 +566,13 @@ class HevyAPI:
         Returns:
             Dict containing the updated workout information
         """
-        try:
-            # Don't wrap the data if it's already wrapped
-            data = workout_data if "workout" in workout_data else {"workout": workout_data}
-            response = requests.put(
-                f"{self.BASE_URL}/workouts/{workout_id}",
-                headers=self.headers,
-                json=data
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error details: {str(e)}")
-            if hasattr(e.response, 'text'):
-                print(f"Response body: {e.response.text}")
-            raise
-    
-    async def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict:
-        """Make an HTTP request to the Hevy API.
-        
-        Args:
-            method (str): HTTP method (GET, POST, PUT, DELETE)
-            endpoint (str): API endpoint path
-            **kwargs: Additional arguments to pass to requests
-            
-        Returns:
-            Dict containing the API response
-        """
-        try:
-            response = requests.request(
-                method,
-                f"{self.BASE_URL}{endpoint}",
-                headers=self.headers,
-                **kwargs
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error details: {str(e)}")
-            if hasattr(e, 'response') and hasattr(e.response, 'text'):
-                print(f"Response body: {e.response.text}")
-            raise
+        # Don't wrap the data if it's already wrapped
+        data = workout_data if "workout" in workout_data else {"workout": workout_data}
+        return await self._request_json("PUT", f"/workouts/{workout_id}", json=data)
 
     async def create_workout(self, workout_data: Dict) -> Dict:
         """Create a new workout"""
-        response = await self._make_request("POST", "/workouts", json=workout_data)
+        response = await self._request_json("POST", "/workouts", json=workout_data)
         return response
 
     async def get_routine(self, routine_id: str) -> Dict[str, Any]:
@@ -347,41 +585,32 @@ class HevyAPI:
         Returns:
             Dict containing detailed routine information
         """
-        print(f"--- HevyAPI (httpx): Fetching routine ID {routine_id} --- ")
-        try:
-            # --- ADDED: Log exact URL and headers before request --- 
-            request_url = f"{self.BASE_URL}/routines/{routine_id}"
-            print(f"--- Making GET request to: {request_url} ---")
-            print(f"--- With Headers: {self.client.headers} ---")
-            
-            # --- UPDATED: Use async httpx client --- 
-            response = await self.client.get(
-                request_url # Use the logged URL
-                # No headers needed here, client was initialized with them
-            )
-            response.raise_for_status()
-            return response.json()
-        # --- UPDATED: Handle httpx specific errors --- 
-        except httpx.HTTPStatusError as e:
-            print(f"HTTP error fetching routine {routine_id}: {e.response.status_code} - {e.response.text}")
-            raise # Re-raise to be handled by caller
-        except Exception as e:
-            print(f"Error fetching routine {routine_id} (httpx): {str(e)}")
-            traceback.print_exc()
-            raise # Re-raise to be handled by caller
-    
+        log.debug("--- HevyAPI (httpx): Fetching routine ID %s ---", routine_id)
+        return await self._request_json("GET", f"/routines/{routine_id}")
+
+    async def get_routines_bulk(self, routine_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch several routines concurrently, in the order given.
+        Prefer this over awaiting get_routine in a loop; requests are still paced by the rate limiter.
+        """
+        return await asyncio.gather(*(self.get_routine(routine_id) for routine_id in routine_ids))
+
     async def create_routine(self, routine_data: Dict) -> Dict:
         """Create a new routine"""
-        response = await self._make_request("POST", "/routines", json={"routine": routine_data["routine"]})
+        response = await self._request_json("POST", "/routines", json={"routine": routine_data["routine"]})
+        self.invalidate_routines()
         return response
 
     async def update_routine(self, routine_id: str, routine_data: dict) -> dict:
         """Update a routine"""
         url = f"/routines/{routine_id}"
-        print(f"Updating routine at URL: {self.BASE_URL}{url}")
-        print(f"Update payload: {routine_data}")
-        response = await self._make_request("PUT", url, json={"routine": routine_data["routine"]})
-        print(f"Update response: {response}")
+        if log.isEnabledFor(logging.DEBUG): # The payload repr is a whole routine; skip building it outside DEBUG
+            log.debug("Updating routine at URL: %s%s", self.BASE_URL, url)
+            log.debug("Update payload: %s", routine_data)
+        response = await self._request_json("PUT", url, json={"routine": routine_data["routine"]})
+        self.invalidate_routines()
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Update response: %s", response)
         return response
 
     async def get_exercise(self, exercise_id: str) -> Dict[str, Any]:
@@ -394,19 +623,8 @@ class HevyAPI:
         Returns:
             Dict containing detailed exercise information
         """
-        try:
-            response = requests.get(
-                f"{self.BASE_URL}/exercises/{exercise_id}",
-                headers=self.headers
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error details: {str(e)}")
-            if hasattr(e.response, 'text'):
-                print(f"Response body: {e.response.text}")
-            raise
-    
+        return await self._cached_get(f"/exercises/{exercise_id}", ttl=EXERCISE_CACHE_TTL)
+
     async def search_exercises(self, query: str, limit: int = 10, page: int = 1) -> PaginatedResponse:
         """
         Search for exercises by name with pagination.
@@ -425,30 +643,20 @@ class HevyAPI:
                 - has_more: Whether there are more pages
         """
         try:
-            response = requests.get(
-                f"{self.BASE_URL}/exercises/search",
-                headers=self.headers,
-                params={"q": query, "limit": limit, "page": page}
-            )
-            response.raise_for_status()
-            data = response.json()
+            data = await self._request_json("GET", "/exercises/search", params={"q": query, "limit": limit, "page": page})
 
             # Standardize pagination logic
-            current_page = data.get("page", page)
-            page_count = data.get("page_count", 1) # Assume page_count is returned
-            has_more_calculated = current_page < page_count
+            parsed = _Page.parse(data, "data", page)
 
             return {
-                "data": data.get("data", []),
+                "data": parsed.items,
                 "total": data.get("total", 0), # Or estimate
-                "page": current_page,
+                "page": parsed.page,
                 "limit": data.get("limit", limit),
-                "has_more": has_more_calculated
+                "has_more": parsed.has_more,
+                "page_count": parsed.page_count
             }
-        except requests.exceptions.RequestException as e:
-            print(f"Error searching exercises: {str(e)}") # Added context to error msg
-            if hasattr(e.response, 'text'):
-                print(f"Response body: {e.response.text}")
+        except httpx.HTTPError: # Already logged by _send
             # Return empty response on error
             return {"data": [], "total": 0, "page": page, "limit": limit, "has_more": False}
 
@@ -462,54 +670,33 @@ class HevyAPI:
         Returns:
             List of all matching exercise data
         """
-        all_matches = []
-        page = 1
         limit = 100  # Use a larger limit to minimize API calls
-        
-        while True:
-            response = await self.search_exercises(query=query, limit=limit, page=page)
-            all_matches.extend(response["data"])
-            
-            if not response["has_more"]:
-                break
-                
-            page += 1
-            
-        return all_matches
+        return await self._fetch_all_pages(lambda page: self.search_exercises(query=query, limit=limit, page=page))
 
     async def get_exercise_templates(self, limit: int = 10, page: int = 1) -> PaginatedResponse:
         """
         Fetch available exercise templates with pagination using httpx.
         Uses pageSize parameter as required by this specific endpoint.
         """
-        page_size = min(limit, 10)
-        print(f"--- HevyAPI (httpx): Fetching exercise templates page {page} with pageSize {page_size} ---")
+        page_size = min(limit, MAX_PAGE_SIZE)
+        log.debug("--- HevyAPI (httpx): Fetching exercise templates page %s with pageSize %s ---", page, page_size)
         try:
-            response = await self.client.get(
-                f"{self.BASE_URL}/exercise_templates",
-                params={"pageSize": page_size, "page": page}
-            )
-            response.raise_for_status()
-            data = response.json()
+            data = await self._cached_get("/exercise_templates", {"pageSize": page_size, "page": page}, TEMPLATE_CACHE_TTL)
             
-            templates = data.get("exercise_templates", [])
-            page_count = data.get("page_count", 1)
-            current_page = data.get("page", page)
-            total_templates = page_count * page_size
+            parsed = _Page.parse(data, "exercise_templates", page)
 
             return {
-                "data": templates,
-                "total": total_templates, 
-                "page": current_page,
+                "data": parsed.items,
+                "total": parsed.page_count * page_size,
+                "page": parsed.page,
                 "limit": page_size,
-                "has_more": current_page < page_count
+                "has_more": parsed.has_more,
+                "page_count": parsed.page_count
             }
-        except httpx.HTTPStatusError as e:
-            print(f"HTTP error fetching exercise templates: {e.response.status_code} - {e.response.text}")
+        except httpx.HTTPError: # Already logged by _send
             return {"data": [], "total": 0, "page": page, "limit": page_size, "has_more": False}
-        except Exception as e:
-            print(f"Error fetching exercise templates (httpx): {str(e)}")
-            traceback.print_exc() # Print traceback for unexpected errors
+        except Exception:
+            log.exception("Error fetching exercise templates page %s", page)
             return {"data": [], "total": 0, "page": page, "limit": page_size, "has_more": False}
             
     async def get_all_exercise_templates(self) -> List[Dict[str, Any]]:
@@ -520,38 +707,29 @@ class HevyAPI:
         Returns:
             List of dictionaries, each containing {'title': str, 'id': str, 'primary_muscle_group': str}
         """
-        extracted_templates = [] # Changed variable name
-        page = 1
-        limit = 10 # Use API max page size
-        print("--- HevyAPI: Fetching ALL exercise templates (extracting title/id/muscle)... ---")
-        while True:
-            try:
-                response = await self.get_exercise_templates(limit=limit, page=page)
-                page_data = response.get("data", [])
-                if not page_data:
-                    print(f"--- HevyAPI: No template data returned for page {page}. Stopping. ---")
-                    break
-                
-                # Extract only necessary fields
-                for template in page_data:
-                    extracted_templates.append({
-                        'title': template.get('title', 'Unknown'),
-                        'id': template.get('id'),
-                        'primary_muscle_group': template.get('primary_muscle_group')
-                    })
-                    
-                print(f"--- HevyAPI: Fetched page {page}, total extracted templates now {len(extracted_templates)} ---")
-                
-                if not response.get("has_more"):
-                    print("--- HevyAPI: No more pages indicated. Finished fetching templates. ---")
-                    break
-                    
-                page += 1
-                await asyncio.sleep(0.2) 
-            except Exception as e:
-                 print(f"Error fetching page {page} of exercise templates: {e}")
-                 break 
-        print(f"--- HevyAPI: Finished fetching ALL exercise templates. Total extracted: {len(extracted_templates)} ---")
+        # Concurrent callers await the crawl already in progress instead of starting another
+        task = self._all_templates_task
+        if task is None:
+            task = self._all_templates_task = asyncio.ensure_future(self._fetch_all_exercise_templates())
+            task.add_done_callback(lambda _: setattr(self, "_all_templates_task", None))
+        return await asyncio.shield(task)
+
+    async def _fetch_all_exercise_templates(self) -> List[Dict[str, Any]]:
+        """Crawls every exercise template page for get_all_exercise_templates."""
+        limit = MAX_PAGE_SIZE
+        log.debug("--- HevyAPI: Fetching ALL exercise templates (extracting title/id/muscle)... ---")
+        pages = await self._gather_pages(lambda page: self.get_exercise_templates(limit=limit, page=page))
+        # Extract only necessary fields, straight from the page payloads; a malformed template without an id is skipped
+        extracted_templates = [
+            {
+                'title': template.get('title', 'Unknown'),
+                'id': template['id'],
+                'primary_muscle_group': template.get('primary_muscle_group')
+            }
+            for template in chain.from_iterable(page["data"] for page in pages)
+            if template.get('id') is not None
+        ]
+        log.debug("--- HevyAPI: Finished fetching ALL exercise templates. Total extracted: %s ---", len(extracted_templates))
         return extracted_templates # Return the list of extracted dicts
 
     async def get_exercise_template(self, template_id: str) -> Dict[str, Any]:
@@ -564,37 +742,23 @@ class HevyAPI:
         Returns:
             Dict containing detailed exercise template information
         """
-        try:
-            response = requests.get(
-                f"{self.BASE_URL}/exercise_templates/{template_id}",
-                headers=self.headers
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error details: {str(e)}")
-            if hasattr(e.response, 'text'):
-                print(f"Response body: {e.response.text}")
-            raise
+        return await self._cached_get(f"/exercise_templates/{template_id}", ttl=TEMPLATE_CACHE_TTL)
+
+    async def get_exercise_templates_bulk(self, template_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch several exercise templates concurrently, in the order given.
+        Prefer this over awaiting get_exercise_template in a loop; cached templates don't hit the API.
+        """
+        return await asyncio.gather(*(self.get_exercise_template(template_id) for template_id in template_ids))
 
     async def get_workout_count(self) -> int:
         """Get the total number of workouts on the account."""
-        try:
-            response = requests.get(
-                f"{self.BASE_URL}/workouts/count",
-                headers=self.headers
-            )
-            response.raise_for_status()
-            return response.json().get("count", 0)
-        except requests.exceptions.RequestException as e:
-            print(f"Error details: {str(e)}")
-            if hasattr(e.response, 'text'):
-                print(f"Response body: {e.response.text}")
-            raise
+        data = await self._request_json("GET", "/workouts/count")
+        return data.get("count", 0)
 
     async def get_workout_events(self, since_date: str) -> Dict:
         """Get workout events since a date"""
-        response = await self._make_request("GET", "/workouts/events", params={"since": since_date})
+        response = await self._request_json("GET", "/workouts/events", params={"since": since_date})
         return response
 
     async def get_routine_folders(self, limit: int = 10, page: int = 1) -> PaginatedResponse:
@@ -613,32 +777,20 @@ class HevyAPI:
                 - limit: Items per page
                 - has_more: Whether there are more pages
         """
-        try:
-            response = requests.get(
-                f"{self.BASE_URL}/routine_folders",
-                headers=self.headers,
-                params={"pageSize": limit, "page": page}
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            # Transform response to match our expected format
-            folders = data.get("routine_folders", [])
-            page_count = data.get("page_count", 1)
-            current_page = data.get("page", page)
-            
-            return {
-                "data": folders,
-                "total": len(folders),
-                "page": current_page,
-                "limit": limit,
-                "has_more": current_page < page_count
-            }
-        except requests.exceptions.RequestException as e:
-            print(f"Error details: {str(e)}")
-            if hasattr(e.response, 'text'):
-                print(f"Response body: {e.response.text}")
-            raise
+        limit = min(limit, MAX_PAGE_SIZE) # Larger pageSize values are rejected
+        data = await self._request_json("GET", "/routine_folders", params={"pageSize": limit, "page": page})
+
+        # Transform response to match our expected format
+        parsed = _Page.parse(data, "routine_folders", page)
+
+        return {
+            "data": parsed.items,
+            "total": len(parsed.items),
+            "page": parsed.page,
+            "limit": limit,
+            "has_more": parsed.has_more,
+            "page_count": parsed.page_count
+        }
 
     async def create_routine_folder(self, folder_data: Dict) -> Dict:
         """
@@ -653,7 +805,8 @@ class HevyAPI:
         Returns:
             Dict containing the created folder information
         """
-        response = await self._make_request("POST", "/routine_folders", json=folder_data)
+        response = await self._request_json("POST", "/routine_folders", json=folder_data)
+        self.invalidate_routines()
         return response
 
     async def update_routine_folder(self, folder_id: str, folder_data: Dict) -> Dict:
@@ -670,7 +823,9 @@ class HevyAPI:
         Returns:
             Dict containing the updated folder information
         """
-        response = await self._make_request("PUT", f"/routine_folders/{folder_id}", json=folder_data)
+        response = await self._request_json("PUT", f"/routine_folders/{folder_id}", json=folder_data)
+        self._invalidate_cached(f"/routine_folders/{folder_id}")
+        self.invalidate_routines()
         return response
 
     async def delete_routine_folder(self, folder_id: str) -> None:
@@ -680,17 +835,9 @@ class HevyAPI:
         Args:
             folder_id (str): The unique identifier of the folder to delete
         """
-        try:
-            response = requests.delete(
-                f"{self.BASE_URL}/routine_folders/{folder_id}",
-                headers=self.headers
-            )
-            response.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            print(f"Error details: {str(e)}")
-            if hasattr(e.response, 'text'):
-                print(f"Response body: {e.response.text}")
-            raise
+        await self._request_json("DELETE", f"/routine_folders/{folder_id}")
+        self._invalidate_cached(f"/routine_folders/{folder_id}")
+        self.invalidate_routines()
 
     async def get_routine_folder(self, folder_id: str) -> Dict[str, Any]:
         """
@@ -706,31 +853,7 @@ class HevyAPI:
                 - notes: Program description
                 - routines: List of routines in the program
         """
-        try:
-            response = requests.get(
-                f"{self.BASE_URL}/routine_folders/{folder_id}",
-                headers=self.headers
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error details: {str(e)}")
-            if hasattr(e.response, 'text'):
-                print(f"Response body: {e.response.text}")
-            raise
-
-    async def get_routines_in_folder(self, folder_id: str) -> List[Dict[str, Any]]:
-        """
-        Get all routines in a specific folder (workout program).
-        
-        Args:
-            folder_id (str): The unique identifier of the folder
-            
-        Returns:
-            List of routines in the folder
-        """
-        folder = await self.get_routine_folder(folder_id)
-        return folder.get("routines", [])
+        return await self._cached_get(f"/routine_folders/{folder_id}", ttl=ROUTINE_FOLDER_CACHE_TTL)
 
     # --- ADDED: Method to determine current program --- 
     async def get_current_program_details(self) -> Optional[Dict[str, Any]]:
@@ -741,41 +864,44 @@ class HevyAPI:
         Returns:
             Dict containing {'folder': folder_details, 'routines': list_of_routines_in_folder, 'current_routine': routine_details} or None if not found.
         """
-        print("--- HevyAPI: Attempting to determine current program details ---")
+        log.debug("--- HevyAPI: Attempting to determine current program details ---")
         try:
-            # 1. Get most recent workout
-            workouts_response = await self.get_workouts(limit=1, page=1)
+            # 1. Get most recent workout, loading the routine listing alongside it
+            workouts_response, _ = await asyncio.gather(
+                self.get_workouts(limit=1, page=1),
+                self._all_routines()
+            )
             if not workouts_response or not workouts_response.get("data"):
-                print("--- HevyAPI: No recent workouts found. Cannot determine program. ---")
+                log.debug("--- HevyAPI: No recent workouts found. Cannot determine program. ---")
                 return None
             recent_workout = workouts_response["data"][0]
             workout_title = recent_workout.get("title")
-            print(f"--- HevyAPI: Most recent workout title: '{workout_title}' ---")
+            log.debug("--- HevyAPI: Most recent workout title: '%s' ---", workout_title)
             if not workout_title:
-                 print("--- HevyAPI: Recent workout has no title. Cannot match to routine. ---")
+                 log.debug("--- HevyAPI: Recent workout has no title. Cannot match to routine. ---")
                  return None
 
-            # 2. Find the routine matching the last workout title
-            matching_routine = await self.find_routine_by_title(workout_title)
+            # 2. Find the routine matching the last workout title, grouping the program's routines in the same pass
+            matching_routine, routines_by_folder = await self._scan_routines_once(workout_title)
             if not matching_routine:
-                print(f"--- HevyAPI: Could not find routine matching title '{workout_title}'. ---")
+                log.debug("--- HevyAPI: Could not find routine matching title '%s'. ---", workout_title)
                 return None
             folder_id = matching_routine.get("folder_id")
-            print(f"--- HevyAPI: Matching routine '{matching_routine.get('title')}' found (ID: {matching_routine.get('id')}), Folder ID: {folder_id} ---")
+            log.debug("--- HevyAPI: Matching routine '%s' found (ID: %s), Folder ID: %s ---", matching_routine.get('title'), matching_routine.get('id'), folder_id)
             if not folder_id:
-                print("--- HevyAPI: Matching routine is not in a folder. Cannot determine program. ---")
+                log.debug("--- HevyAPI: Matching routine is not in a folder. Cannot determine program. ---")
                 return None
 
             # 3. Find the routine folder (program)
             matching_folder = await self.find_routine_folder_by_id(folder_id)
             if not matching_folder:
-                print(f"--- HevyAPI: Could not find routine folder with ID {folder_id}. ---")
+                log.debug("--- HevyAPI: Could not find routine folder with ID %s. ---", folder_id)
                 return None
-            print(f"--- HevyAPI: Matching folder (program) '{matching_folder.get('title')}' found. ---")
+            log.debug("--- HevyAPI: Matching folder (program) '%s' found. ---", matching_folder.get('title'))
 
-            # 4. Get all routines within that program folder
-            program_routines = await self.get_routines_in_folder(folder_id)
-            print(f"--- HevyAPI: Found {len(program_routines)} routines in folder ID {folder_id}. ---")
+            # 4. All routines within that program folder, collected by the scan above
+            program_routines = routines_by_folder.get(folder_id, [])
+            log.debug("--- HevyAPI: Found %s routines in folder ID %s. ---", len(program_routines), folder_id)
 
             return {
                 "folder": matching_folder,
@@ -783,60 +909,60 @@ class HevyAPI:
                 "current_routine": matching_routine # The routine that matched the last workout
             }
 
-        except Exception as e:
-            print(f"--- HevyAPI: Error in get_current_program_details: {e} ---")
-            # Optionally re-raise or log traceback
+        except Exception:
+            log.exception("--- HevyAPI: Error in get_current_program_details ---")
             return None
 
+    async def _scan_routines_once(self, title: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+        """
+        One pass over all routines: returns the first routine with the exact title
+        and the routines grouped by folder_id.
+        """
+        matching_routine = None
+        routines_by_folder: Dict[str, List[Dict[str, Any]]] = {}
+        for routine in await self._all_routines():
+            if matching_routine is None and routine.get("title") == title:
+                matching_routine = routine
+            routines_by_folder.setdefault(routine.get("folder_id"), []).append(routine)
+        return matching_routine, routines_by_folder
+
     async def find_routine_by_title(self, title: str) -> Optional[Dict[str, Any]]:
         """Helper to find a specific routine by its exact title, searching across pages."""
-        page = 1
-        while True:
-            routines_response = await self.get_routines(page=page)
-            if not routines_response or not routines_response.get("data"):
-                return None # No more routines
-            for routine in routines_response["data"]:
-                if routine.get("title") == title:
-                    return routine
-            if not routines_response.get("has_more"):
-                return None # Reached end without finding
-            page += 1
-            await asyncio.sleep(0.1) # Avoid potential rate limits
+        first_page = None
+        if "routines" not in self._listing_cache:
+            # Cold cache: the routine is usually on the first page, so try that before crawling every page
+            first_page = await self._get_routines_page(MAX_PAGE_SIZE, 1)
+            match = next((routine for routine in first_page["data"] if routine.get("title") == title), None)
+            if match is not None or not first_page["has_more"]:
+                return match
+        # Repeated lookups in a session are a hash probe on the cached listing; a cold crawl resumes from the probed page
+        return (await self._routines_by_title(first_page)).get(title)
 
     async def find_routine_folder_by_id(self, folder_id: str) -> Optional[Dict[str, Any]]:
-        """Helper to find a specific routine folder by ID, searching across pages."""
-        page = 1
-        while True:
-            folders_response = await self.get_routine_folders(page=page)
-            if not folders_response or not folders_response.get("data"):
-                return None # No more folders
-            for folder in folders_response["data"]:
-                if folder.get("id") == folder_id:
-                    return folder
-            # Check pagination based on total and page size (assuming API provides page_count or similar)
-            # Simple check if data is empty or assume no more pages if API doesn't give clear indication
-            # For now, using a simple check - needs improvement based on actual API response structure for folders pagination
-            current_page_count = len(folders_response.get("data", []))
-            limit = folders_response.get("limit", 100) # Use the actual limit from response if available
-            if current_page_count < limit: # Simple assumption: if less than limit fetched, it's the last page
-                 return None # Reached end without finding
-
-            page += 1
-            await asyncio.sleep(0.1) # Avoid potential rate limits
+        """Helper to find a specific routine folder by ID: one direct GET, scanning the folder listing only if that 404s."""
+        try:
+            # get_routine_folder, but a 404 here is the expected cue to fall back, not an error worth logging
+            return await self._cached_get(f"/routine_folders/{folder_id}", ttl=ROUTINE_FOLDER_CACHE_TTL, expected_statuses=(404,))
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 404:
+                raise
+        folders = await self._all_routine_folders()
+        return next((folder for folder in folders if folder.get("id") == folder_id), None)
 
     async def get_routines_in_folder(self, folder_id: str) -> List[Dict[str, Any]]:
-        """Helper to get all routines belonging to a specific folder ID, handling pagination."""
-        routines_in_folder = []
-        page = 1
-        while True:
-            routines_response = await self.get_routines(page=page)
-            if not routines_response or not routines_response.get("data"):
-                break # No more routines
-            for routine in routines_response["data"]:
-                if routine.get("folder_id") == folder_id:
-                    routines_in_folder.append(routine)
-            if not routines_response.get("has_more"):
-                break # Reached end
-            page += 1
-            await asyncio.sleep(0.1) # Avoid potential rate limits
-        return routines_in_folder 
\ No newline at end of file
+        """
+        Get all routines in a specific folder (workout program), from the cached routine listing.
+        
+        Args:
+            folder_id (str): The unique identifier of the folder
+            
+        Returns:
+            List of routines in the folder
+        """
+        index = await self._routines_by_folder()
+        return list(index.get(folder_id, ())) # Copy, so callers can't change the cached group
+
+@functools.lru_cache(maxsize=1)
+def get_shared_hevy_api() -> HevyAPI:
+    """Returns the process-wide HevyAPI, so every user shares one settings read, header dict and connection pool."""
+    return HevyAPI()
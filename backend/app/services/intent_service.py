@@ -1,10 +1,17 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Sequence
 import json
 import os
 import sys
 import openai
 import re # Import regex
+import logging
 from .hevy_api import HevyAPI
+from .ai_workout_optimizer import _CHOSEN_ALT_RE
+
+log = logging.getLogger(__name__)
+
+# Created on first use and then reused, so classification calls share one connection pool
+_client: Optional[openai.AsyncOpenAI] = None
 
 # Placeholder for getting AI response - we might centralize this later
 # Ensure OPENAI_API_KEY is set in your environment variables or .env file
@@ -12,12 +19,15 @@ async def get_ai_response(prompt: str, system_prompt: str = None) -> str:
     # It's good practice to handle potential missing API key
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
-        print("Error: OPENAI_API_KEY not found in environment variables.")
+        log.error("Error: OPENAI_API_KEY not found in environment variables.")
         return "Configuration Error: Missing OpenAI API Key." # Return error message
 
     # Use a non-async client if running in a synchronous context,
     # but since FastAPI uses async, AsyncClient is appropriate here.
-    client = openai.AsyncOpenAI(api_key=api_key)
+    global _client
+    if _client is None:
+        _client = openai.AsyncOpenAI(api_key=api_key, max_retries=2, timeout=30)
+    client = _client
     messages = []
     if system_prompt:
         messages.append({"role": "system", "content": system_prompt})
@@ -33,7 +43,7 @@ async def get_ai_response(prompt: str, system_prompt: str = None) -> str:
         response_content = response_content.strip().strip('`')
         return response_content
     except Exception as e:
-        print(f"Error calling OpenAI API: {e}")
+        log.error("Error calling OpenAI API: %s", e)
         # Provide a more informative error or fallback
         return "ERROR_AI_CALL" # Indicate an error during the AI call
 
@@ -99,9 +109,9 @@ class IntentService:
                     break # Stop after first match
                     
         if exercise_name:
-            print(f"--- _extract_exercise_name: Found potential name: '{exercise_name}' ---")
+            log.debug("--- _extract_exercise_name: Found potential name: '%s' ---", exercise_name)
         else:
-            print(f"--- _extract_exercise_name: Could not reliably extract name from '{message}' ---")
+            log.debug("--- _extract_exercise_name: Could not reliably extract name from '%s' ---", message)
             
         return exercise_name
 
@@ -124,22 +134,22 @@ class IntentService:
                 routine_name = potential_name.title() 
             else:
                  routine_name = potential_name # Keep PPL as PPL
-            print(f"--- _extract_routine_name: Found potential name: '{routine_name}' ---")
+            log.debug("--- _extract_routine_name: Found potential name: '%s' ---", routine_name)
         else:
-            print(f"--- _extract_routine_name: Could not reliably extract name from '{message}' ---")
+            log.debug("--- _extract_routine_name: Could not reliably extract name from '%s' ---", message)
             
         return routine_name
 
-    async def classify_intent(self, message: str, conversation_history: Optional[List[Dict]] = None) -> str:
+    async def classify_intent(self, message: str, conversation_history: Optional[Sequence[Dict]] = None) -> str:
         """
         Classify the user's intent based on their message using an AI model,
         optionally considering the last assistant message for context.
         """
-        print(f"--- Classifying Intent for: '{message}' ---")
+        log.debug("--- Classifying Intent for: '%s' ---", message)
 
         # --- ADDED: Strip potential surrounding quotes from message --- 
         message_content = message.strip().strip('"').strip("'")
-        print(f"--- Stripped message content for prompt: '{message_content}' ---")
+        log.debug("--- Stripped message content for prompt: '%s' ---", message_content)
 
         # --- ADDED: Get last assistant message --- 
         last_assistant_message = None
@@ -151,7 +161,7 @@ class IntentService:
                     # Limit length to avoid excessive prompt size
                     if last_assistant_message and len(last_assistant_message) > 500:
                          last_assistant_message = last_assistant_message[:500] + "..."
-                    print("--- Including last assistant message (truncated) in classification prompt context. ---")
+                    log.debug("--- Including last assistant message (truncated) in classification prompt context. ---")
                     break
         
         # --- Conditionally construct the prompt --- 
@@ -195,7 +205,7 @@ class IntentService:
         
         # --- Make the AI call --- 
         intent_key_response = await get_ai_response(prompt, system_prompt)
-        print(f"--- Raw AI classification response: '{intent_key_response}' ---") # Log raw response
+        log.debug("--- Raw AI classification response: '%s' ---", intent_key_response) # Log raw response
 
         # --- Clean and validate the response --- 
         # Attempt to extract a valid intent key even if the response is noisy
@@ -206,48 +216,49 @@ class IntentService:
             # Simpler check: find the key as a substring, possibly quoted
             if f'"{valid_key}"' in intent_key_response or f"'{valid_key}'" in intent_key_response or valid_key == intent_key_response.strip():
                  cleaned_intent_key = valid_key
-                 print(f"--- Extracted valid key '{valid_key}' from AI response. ---")
+                 log.debug("--- Extracted valid key '%s' from AI response. ---", valid_key)
                  break # Found a valid key
             # Fallback: Check if the key exists as a word (less precise)
             elif re.search(rf'\b{re.escape(valid_key)}\b', intent_key_response):
                 cleaned_intent_key = valid_key
-                print(f"--- Extracted valid key '{valid_key}' (substring match) from AI response. ---")
+                log.debug("--- Extracted valid key '%s' (substring match) from AI response. ---", valid_key)
                 # Don't break here, prefer exact/quoted match if found later
 
         # Now check the extracted/default key
         if cleaned_intent_key != "UNKNOWN":
-            print(f"--- Classified Intent: {cleaned_intent_key} ---")
+            log.debug("--- Classified Intent: %s ---", cleaned_intent_key)
             return cleaned_intent_key
         # Handle specific error code from get_ai_response if extraction failed
         elif intent_key_response == "ERROR_AI_CALL": 
-             print(f"--- Intent Classification Failed (AI Error) ---")
+             log.error("--- Intent Classification Failed (AI Error) ---")
              return "UNKNOWN" 
         else:
             # Log the original unexpected response if no valid key was extracted
-            print(f"--- Warning: Could not extract valid intent key from AI response '{intent_key_response}'. Falling back to UNKNOWN. ---")
+            log.warning("--- Warning: Could not extract valid intent key from AI response '%s'. Falling back to UNKNOWN. ---", intent_key_response)
             return "UNKNOWN"
 
-    async def get_relevant_context(self, intent: str, message: str) -> Dict[str, Any]:
+    async def get_relevant_context(self, intent: str, message: str, raise_errors: bool = False) -> Dict[str, Any]:
         """
         Fetches relevant context data based on the classified intent by calling HevyAPI.
+        Errors are logged and the context gathered so far is returned, unless raise_errors is set.
         """
-        print(f"--- Getting Context for Intent: {intent} ---")
+        log.debug("--- Getting Context for Intent: %s ---", intent)
         context = {}
         hevy_api = self.hevy_api # Use the injected instance
 
         # --- ADDED: Handle context specifically for SUGGESTION_IMPLEMENT --- 
         if intent == "SUGGESTION_IMPLEMENT":
-            print("--- Context for SUGGESTION_IMPLEMENT: Extracting chosen item... ---")
+            log.debug("--- Context for SUGGESTION_IMPLEMENT: Extracting chosen item... ---")
             # We need to extract the chosen exercise name from the *current* message.
             # This is tricky. Let's try a simple approach: look for capitalized words 
             # or words matching known exercise templates AFTER keywords like 'use', 'with', 'go with'.
             # THIS IS A PLACEHOLDER - Needs more robust logic or reliance on frontend passing context.
-            chosen_match = re.search(r"(?:use|with|go with|choose|select)\s+([\w\s\(\)-]+)", message, re.IGNORECASE)
+            chosen_match = _CHOSEN_ALT_RE.search(message)
             if chosen_match:
                 context['chosen_alternative_title'] = chosen_match.group(1).strip()
-                print(f"--- Extracted potential chosen alternative: '{context['chosen_alternative_title']}' ---")
+                log.debug("--- Extracted potential chosen alternative: '%s' ---", context['chosen_alternative_title'])
             else:
-                 print("--- WARNING: Could not extract chosen alternative from message for SUGGESTION_IMPLEMENT. Handler will need fallback/clarification. ---")
+                 log.warning("--- WARNING: Could not extract chosen alternative from message for SUGGESTION_IMPLEMENT. Handler will need fallback/clarification. ---")
             # NOTE: routine_id and exercise_to_swap_title MUST be passed via external context/state management.
             # We *cannot* reliably get them just from the message here.
             # The AIWorkoutOptimizer will check context for these.
@@ -259,28 +270,28 @@ class IntentService:
             if intent == "WORKOUT_INFO":
                 # Fetch last workout for specific keywords, otherwise maybe recent few?
                 if "last workout" in message.lower() or "most recent" in message.lower() or "yesterday" in message.lower(): # Simple keyword check
-                    print("--- Fetching last workout (limit 1) for WORKOUT_INFO ---")
+                    log.debug("--- Fetching last workout (limit 1) for WORKOUT_INFO ---")
                     workouts_response = await hevy_api.get_workouts(limit=1, page=1)
                     if workouts_response and workouts_response.get("data"):
                         context['last_workout'] = workouts_response["data"][0]
-                        print(f"--- Found last workout: {context['last_workout'].get('title', 'Unknown')} ---")
+                        log.debug("--- Found last workout: %s ---", context['last_workout'].get('title', 'Unknown'))
                 else:
                     # Fetch a few recent workouts for general workout info questions
-                    print("--- Fetching recent workouts (limit 5) for WORKOUT_INFO ---")
+                    log.debug("--- Fetching recent workouts (limit 5) for WORKOUT_INFO ---")
                     workouts_response = await hevy_api.get_workouts(limit=5, page=1)
                     if workouts_response and workouts_response.get("data"):
                         context['recent_workouts'] = workouts_response["data"]
-                        print(f"--- Found {len(context['recent_workouts'])} recent workouts ---")
+                        log.debug("--- Found %s recent workouts ---", len(context['recent_workouts']))
                 # TODO: Add logic to parse specific dates/IDs/titles from message
 
             elif intent == "ROUTINE_INFO":
                  # --- Reverted to simple fallback due to persistent syntax errors in name extraction ---
-                 print(f"--- Fetching all routine titles (fallback) for ROUTINE_INFO from message: '{message}' ---")
+                 log.debug("--- Fetching all routine titles (fallback) for ROUTINE_INFO from message: '%s' ---", message)
                  # Fallback: Fetching all routine titles as placeholder
                  all_routines = await hevy_api.get_all_routines()
                  context['all_routines'] = all_routines
                  # --- UPDATED: Try to fetch SPECIFIC routine first ---
-                 print(f"--- Attempting to fetch specific routine for ROUTINE_INFO from message: '{message}' ---")
+                 log.debug("--- Attempting to fetch specific routine for ROUTINE_INFO from message: '%s' ---", message)
                  # --- COMMENTED OUT name extraction due to syntax issues ---
                  # extracted_name = self._extract_routine_name(message)
                  extracted_name = None # Default to None for now
@@ -291,33 +302,33 @@ class IntentService:
 
                  if specific_routine: # This block will currently not be entered
                      context['specific_routine_details'] = specific_routine
-                     print(f"--- Found specific routine details for: '{extracted_name}' ---")
+                     log.debug("--- Found specific routine details for: '%s' ---", extracted_name)
                  else:
                      # Fallback: Fetching all routine titles as placeholder
-                     print(f"--- Could not find specific routine '{extracted_name}' (or no name extracted). Fetching all routine titles as fallback. ---")
+                     log.debug("--- Could not find specific routine '%s' (or no name extracted). Fetching all routine titles as fallback. ---", extracted_name)
                      all_routines = await hevy_api.get_all_routines()
                      context['all_routines'] = all_routines
-                     print(f"--- Found {len(context['all_routines'])} total routines (fallback context) ---")
+                     log.debug("--- Found %s total routines (fallback context) ---", len(context['all_routines']))
 
             elif intent == "EXERCISE_INFO":
-                 print("--- Fetching all exercise templates for EXERCISE_INFO ---")
+                 log.debug("--- Fetching all exercise templates for EXERCISE_INFO ---")
                  # Fetching templates might be better than user's logged exercises for general info
                  all_templates = await hevy_api.get_all_exercise_templates()
                  context['all_exercise_templates'] = all_templates
-                 print(f"--- Found {len(context['all_exercise_templates'])} exercise templates ---")
+                 log.debug("--- Found %s exercise templates ---", len(context['all_exercise_templates']))
                  # TODO: Parse specific exercise name from message, fetch its details, maybe fetch user's history for *that* exercise.
 
             # --- Analysis Context ---
             elif intent == "PROGRAM_ANALYSIS":
-                print("--- Fetching current program details & exercise templates for PROGRAM_ANALYSIS ---")
+                log.debug("--- Fetching current program details & exercise templates for PROGRAM_ANALYSIS ---")
                 # Fetch program details
                 current_program = await hevy_api.get_current_program_details()
                 if current_program:
                     context['current_program_folder'] = current_program.get('folder')
                     context['current_program_routines'] = current_program.get('routines')
-                    print(f"--- Found current program: {context['current_program_folder'].get('title', 'Unknown')} with {len(context.get('current_program_routines', []))} routines for analysis ---")
+                    log.debug("--- Found current program: %s with %s routines for analysis ---", context['current_program_folder'].get('title', 'Unknown'), len(context.get('current_program_routines', [])))
                 else:
-                    print("--- Could not determine current program for PROGRAM_ANALYSIS ---")
+                    log.debug("--- Could not determine current program for PROGRAM_ANALYSIS ---")
                 
                 # --- REMOVED: Templates should be loaded on startup and accessed by AIWorkoutOptimizer --- 
                 # Fetch exercise templates
@@ -326,17 +337,17 @@ class IntentService:
                 # print(f"--- Found {len(context['all_exercise_templates'])} exercise templates for analysis context ---")
 
             elif intent == "WORKOUT_ANALYSIS" or intent == "EXERCISE_ANALYSIS" or intent == "COMPARATIVE_ANALYSIS":
-                print(f"--- Fetching recent workouts (limit 30) for Analysis Intent: {intent} ---")
+                log.debug("--- Fetching recent workouts (limit 30) for Analysis Intent: %s ---", intent)
                 # Need a decent number of workouts for trend analysis
                 workouts_response = await hevy_api.get_workouts(limit=30, page=1) # Fetch more for analysis
                 if workouts_response and workouts_response.get("data"):
                     context['recent_workouts'] = workouts_response["data"]
-                    print(f"--- Found {len(context['recent_workouts'])} recent workouts for analysis ---")
+                    log.debug("--- Found %s recent workouts for analysis ---", len(context['recent_workouts']))
                 # TODO: Parse specific exercise name for EXERCISE_ANALYSIS/COMPARATIVE_ANALYSIS
 
             # --- Modification Context ---
             elif intent == "EXERCISE_SWAP" or intent == "ROUTINE_UPDATE":
-                print(f"--- Fetching routines/folders/exercises for Modification Intent: {intent} ---")
+                log.debug("--- Fetching routines/folders/exercises for Modification Intent: %s ---", intent)
                 
                 # Extract common entities needed for modifications
                 extracted_exercise = self._extract_exercise_name(message)
@@ -346,13 +357,13 @@ class IntentService:
                 extracted_routine_name = self._extract_routine_name(message)
                 if extracted_routine_name:
                     # Try to find the specific routine by its extracted name
-                    print(f"--- Searching for routine title: '{extracted_routine_name}' ---")
+                    log.debug("--- Searching for routine title: '%s' ---", extracted_routine_name)
                     target_routine = await hevy_api.find_routine_by_title(extracted_routine_name)
                     if target_routine:
                         context['target_routine_details'] = target_routine
-                        print(f"--- Found specific routine details for '{extracted_routine_name}' (ID: {target_routine.get('id')}) ---")
+                        log.debug("--- Found specific routine details for '%s' (ID: %s) ---", extracted_routine_name, target_routine.get('id'))
                     else:
-                        print(f"--- Could not find specific routine named '{extracted_routine_name}' by title. ---")
+                        log.debug("--- Could not find specific routine named '%s' by title. ---", extracted_routine_name)
                 
                 # Fetch all routines (useful for context or updates)
                 all_routines = await hevy_api.get_all_routines()
@@ -363,7 +374,7 @@ class IntentService:
                     folders_response = await hevy_api.get_routine_folders(limit=10) # CORRECTED: Use 'limit' parameter
                     context['routine_folders'] = folders_response.get("data", [])
                 except Exception as folder_err:
-                    print(f"!!! Error fetching routine folders: {folder_err} !!!")
+                    log.error("!!! Error fetching routine folders: %s !!!", folder_err)
 
                 # Fetch exercise templates only if needed (e.g., for swapping)
                 if intent == "EXERCISE_SWAP":
@@ -375,47 +386,49 @@ class IntentService:
                     # context['all_exercise_templates'] = all_templates
                     pass # Assume AI Opt has access to cached templates
                 
-                print(f"--- Found {len(context.get('all_routines',[]))} routines, {len(context.get('routine_folders',[]))} folders for modification context ---")
+                log.debug("--- Found %s routines, %s folders for modification context ---", len(context.get('all_routines',[])), len(context.get('routine_folders',[])))
                 # TODO: Identify specific routine/exercise to modify from message/history
 
             elif intent == "PROGRAM_CREATE":
-                print(f"--- Fetching exercises for Program Creation ---")
+                log.debug("--- Fetching exercises for Program Creation ---")
                 # Need exercise list to build a program
                 all_templates = await hevy_api.get_all_exercise_templates()
                 context['all_exercise_templates'] = all_templates
-                print(f"--- Found {len(context['all_exercise_templates'])} exercise templates for creation ---")
+                log.debug("--- Found %s exercise templates for creation ---", len(context['all_exercise_templates']))
 
             elif intent == "SUGGESTION_IMPLEMENT":
-                print("--- Context for SUGGESTION_IMPLEMENT relies on conversation history (Not fetched here) ---")
+                log.debug("--- Context for SUGGESTION_IMPLEMENT relies on conversation history (Not fetched here) ---")
                 # The AI handler will need to look back in the conversation history
                 pass
 
             # --- ADDED: Handling for PROGRAM_INFO intent ---
             elif intent == "PROGRAM_INFO":
                 if "current" in message.lower() or "active" in message.lower() or "what is my program" in message.lower():
-                    print("--- Fetching current program details for PROGRAM_INFO ---")
+                    log.debug("--- Fetching current program details for PROGRAM_INFO ---")
                     current_program = await hevy_api.get_current_program_details()
                     if current_program:
                         context['current_program_folder'] = current_program.get('folder')
                         context['current_program_routines'] = current_program.get('routines')
-                        print(f"--- Found current program: {context['current_program_folder'].get('title', 'Unknown')} with {len(context.get('current_program_routines', []))} routines ---")
+                        log.debug("--- Found current program: %s with %s routines ---", context['current_program_folder'].get('title', 'Unknown'), len(context.get('current_program_routines', [])))
                     else:
-                        print("--- Could not determine current program for PROGRAM_INFO ---")
+                        log.debug("--- Could not determine current program for PROGRAM_INFO ---")
                 else:
                     # General request for all programs/folders
-                    print("--- Fetching all routine folders for PROGRAM_INFO ---")
+                    log.debug("--- Fetching all routine folders for PROGRAM_INFO ---")
                     folders_response = await hevy_api.get_routine_folders(limit=10) # Use API max limit
                     context['routine_folders'] = folders_response.get("data", [])
-                    print(f"--- Found {len(context['routine_folders'])} routine folders ---")
+                    log.debug("--- Found %s routine folders ---", len(context['routine_folders']))
 
             # GENERAL_INFO, GREETING, UNKNOWN usually don't need Hevy context
 
         except Exception as e:
-            print(f"!!! Error getting context for intent {intent}: {e} !!!")
+            log.error("!!! Error getting context for intent %s: %s !!!", intent, e)
+            if raise_errors:
+                raise
             # import traceback # Uncomment for detailed debugging if needed
             # traceback.print_exc()
 
-        print(f"--- Returning Context Keys: {list(context.keys())} ---")
+        log.debug("--- Returning Context Keys: %s ---", list(context.keys()))
         return context
 
     # --- REMOVED _extract_routine_name method due to persistent syntax/reference errors ---
@@ -1,7 +1,10 @@
 from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import logging
 from .hevy_api import HevyAPI
 
+log = logging.getLogger(__name__)
+
 class WorkoutOptimizer:
     """
     Service for analyzing workout data and providing optimization suggestions.
@@ -26,44 +29,82 @@ class WorkoutOptimizer:
         Returns:
             Dict containing analysis results
         """
-        # Calculate the date range
-        end_date = datetime.utcnow().replace(tzinfo=None)  # Make naive datetime
-        start_date = end_date - timedelta(days=days)
-        
-        print(f"Analyzing workouts from {start_date.isoformat()} to {end_date.isoformat()}")
-        
         try:
-            # Try using get_workouts instead of get_workout_events
-            workouts_response = await self.hevy_api.get_workouts(limit=100, page=1)
-            print(f"Workouts response: {workouts_response}")
-            
-            # Extract workouts from the response
-            workouts = []
-            if "data" in workouts_response:
-                workouts = workouts_response["data"]
-            
-            print(f"Found {len(workouts)} workouts directly")
-            
-            # Filter workouts by date
-            filtered_workouts = []
-            for workout in workouts:
-                if "start_time" in workout:
-                    # Convert to naive datetime for comparison
-                    workout_date = datetime.fromisoformat(workout["start_time"].replace("Z", "+00:00"))
-                    workout_date = workout_date.replace(tzinfo=None)
-                    if start_date <= workout_date <= end_date:
-                        filtered_workouts.append(workout)
-            
-            print(f"Filtered to {len(filtered_workouts)} workouts within date range")
+            filtered_workouts = await self._get_workouts_in_range(days)
             
             # Analyze the workouts
             return self._analyze_workouts(filtered_workouts)
         except Exception as e:
-            print(f"Error in analyze_workout_history: {str(e)}")
+            log.exception("Error in analyze_workout_history")
             return {
                 "total_workouts": 0,
                 "message": f"Error analyzing workout history: {str(e)}"
             }
+
+    async def analyze_one_exercise(self, exercise_id: str, days: int = 90) -> Optional[Dict[str, Any]]:
+        """
+        Analyze a single exercise without aggregating every other exercise.
+        
+        Args:
+            exercise_id: Exercise template ID to analyze
+            days: Number of days of workout history to analyze
+            
+        Returns:
+            Stats for the exercise (same shape as an entry in "exercise_stats"),
+            or None if it wasn't performed in the date range
+        """
+        stats = None
+        for workout in await self._get_workouts_in_range(days):
+            for exercise in workout.get("exercises", []):
+                if exercise.get("exercise_template_id") != exercise_id:
+                    continue
+                if stats is None:
+                    stats = self._new_exercise_stats(exercise)
+                self._add_exercise_sets(stats, exercise, workout.get("start_time", ""))
+        
+        if stats is not None:
+            self._summarize_exercise_stats(stats)
+        return stats
+
+    async def _get_workouts_in_range(self, days: int) -> List[Dict[str, Any]]:
+        """
+        Fetch recent workouts and keep those that started within the last `days` days.
+        
+        Args:
+            days: Number of days of workout history to keep
+            
+        Returns:
+            List of workout data within the date range
+        """
+        # Calculate the date range
+        end_date = datetime.now(timezone.utc)
+        start_date = end_date - timedelta(days=days)
+        
+        log.debug("Analyzing workouts from %s to %s", start_date.isoformat(), end_date.isoformat())
+        
+        # Try using get_workouts instead of get_workout_events
+        workouts_response = await self.hevy_api.get_workouts(limit=100, page=1)
+        
+        # Extract workouts from the response
+        workouts = []
+        if "data" in workouts_response:
+            workouts = workouts_response["data"]
+        
+        log.debug("Found %s workouts directly", len(workouts))
+        
+        # Filter workouts by date
+        filtered_workouts = []
+        for workout in workouts:
+            if "start_time" in workout:
+                # Compare as aware UTC datetimes; a timestamp without an offset is taken as UTC
+                workout_date = datetime.fromisoformat(workout["start_time"].replace("Z", "+00:00"))
+                if workout_date.tzinfo is None:
+                    workout_date = workout_date.replace(tzinfo=timezone.utc)
+                if start_date <= workout_date <= end_date:
+                    filtered_workouts.append(workout)
+        
+        log.debug("Filtered to %s workouts within date range", len(filtered_workouts))
+        return filtered_workouts
     
     def _analyze_workouts(self, workouts: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -104,76 +145,13 @@ class WorkoutOptimizer:
                     continue
                 
                 if exercise_id not in exercise_stats:
-                    exercise_stats[exercise_id] = {
-                        "name": exercise.get("title", "Unknown Exercise"),
-                        "count": 0,
-                        "total_weight": 0,
-                        "total_reps": 0,
-                        "sets": [],
-                        "dates": [],
-                        "progression": []
-                    }
-                
-                stats = exercise_stats[exercise_id]
-                stats["count"] += 1
-                
-                # Track workout dates
-                workout_date = workout.get("start_time", "")
-                if workout_date:
-                    stats["dates"].append(workout_date)
+                    exercise_stats[exercise_id] = self._new_exercise_stats(exercise)
                 
-                # Collect set data
-                for set_data in exercise.get("sets", []):
-                    weight = set_data.get("weight_kg", 0)
-                    reps = set_data.get("reps", 0)
-                    
-                    # Handle None values
-                    weight = weight if weight is not None else 0
-                    reps = reps if reps is not None else 0
-                    
-                    stats["total_weight"] += weight
-                    stats["total_reps"] += reps
-                    stats["sets"].append({
-                        "weight": weight,
-                        "reps": reps,
-                        "date": workout_date
-                    })
-        
-        # Calculate progression for each exercise
-        for exercise_id, stats in exercise_stats.items():
-            if len(stats["sets"]) > 1:
-                # Sort sets by date
-                sorted_sets = sorted(stats["sets"], key=lambda s: s.get("date", ""))
-                
-                # Calculate progression
-                for i in range(1, len(sorted_sets)):
-                    prev_set = sorted_sets[i-1]
-                    curr_set = sorted_sets[i]
-                    
-                    # Only compare if both sets have valid weights and reps
-                    if prev_set["weight"] is not None and curr_set["weight"] is not None:
-                        weight_diff = curr_set["weight"] - prev_set["weight"]
-                        if weight_diff > 0:
-                            stats["progression"].append(f"Increased weight by {weight_diff:.1f}kg")
-                        elif weight_diff < 0:
-                            stats["progression"].append(f"Decreased weight by {abs(weight_diff):.1f}kg")
-                    
-                    if prev_set["reps"] is not None and curr_set["reps"] is not None:
-                        reps_diff = curr_set["reps"] - prev_set["reps"]
-                        if reps_diff > 0:
-                            stats["progression"].append(f"Increased reps by {reps_diff}")
-                        elif reps_diff < 0:
-                            stats["progression"].append(f"Decreased reps by {abs(reps_diff)}")
+                self._add_exercise_sets(exercise_stats[exercise_id], exercise, workout.get("start_time", ""))
         
-        # Calculate average stats
-        for exercise_id, stats in exercise_stats.items():
-            valid_sets = [s for s in stats["sets"] if s["weight"] is not None and s["reps"] is not None]
-            if valid_sets:
-                stats["avg_weight"] = sum(s["weight"] for s in valid_sets) / len(valid_sets)
-                stats["avg_reps"] = sum(s["reps"] for s in valid_sets) / len(valid_sets)
-            else:
-                stats["avg_weight"] = 0
-                stats["avg_reps"] = 0
+        # Calculate progression and average stats for each exercise
+        for stats in exercise_stats.values():
+            self._summarize_exercise_stats(stats)
         
         return {
             "total_workouts": total_workouts,
@@ -182,6 +160,78 @@ class WorkoutOptimizer:
             "message": f"Analyzed {total_workouts} workouts with {len(exercise_stats)} different exercises."
         }
     
+    def _new_exercise_stats(self, exercise: Dict[str, Any]) -> Dict[str, Any]:
+        """Create an empty stats record for an exercise."""
+        return {
+            "name": exercise.get("title", "Unknown Exercise"),
+            "count": 0,
+            "total_weight": 0,
+            "total_reps": 0,
+            "sets": [],
+            "dates": [],
+            "progression": []
+        }
+    
+    def _add_exercise_sets(self, stats: Dict[str, Any], exercise: Dict[str, Any], workout_date: str) -> None:
+        """Add one workout's occurrence of an exercise (and its sets) to its stats record."""
+        stats["count"] += 1
+        
+        # Track workout dates
+        if workout_date:
+            stats["dates"].append(workout_date)
+        
+        # Collect set data
+        for set_data in exercise.get("sets", []):
+            weight = set_data.get("weight_kg", 0)
+            reps = set_data.get("reps", 0)
+            
+            # Handle None values
+            weight = weight if weight is not None else 0
+            reps = reps if reps is not None else 0
+            
+            stats["total_weight"] += weight
+            stats["total_reps"] += reps
+            stats["sets"].append({
+                "weight": weight,
+                "reps": reps,
+                "date": workout_date
+            })
+    
+    def _summarize_exercise_stats(self, stats: Dict[str, Any]) -> None:
+        """Fill in progression and average weight/reps for a completed stats record."""
+        if len(stats["sets"]) > 1:
+            # Sort sets by date
+            sorted_sets = sorted(stats["sets"], key=lambda s: s.get("date", ""))
+            
+            # Calculate progression
+            for i in range(1, len(sorted_sets)):
+                prev_set = sorted_sets[i-1]
+                curr_set = sorted_sets[i]
+                
+                # Only compare if both sets have valid weights and reps
+                if prev_set["weight"] is not None and curr_set["weight"] is not None:
+                    weight_diff = curr_set["weight"] - prev_set["weight"]
+                    if weight_diff > 0:
+                        stats["progression"].append(f"Increased weight by {weight_diff:.1f}kg")
+                    elif weight_diff < 0:
+                        stats["progression"].append(f"Decreased weight by {abs(weight_diff):.1f}kg")
+                
+                if prev_set["reps"] is not None and curr_set["reps"] is not None:
+                    reps_diff = curr_set["reps"] - prev_set["reps"]
+                    if reps_diff > 0:
+                        stats["progression"].append(f"Increased reps by {reps_diff}")
+                    elif reps_diff < 0:
+                        stats["progression"].append(f"Decreased reps by {abs(reps_diff)}")
+        
+        # Calculate average stats
+        valid_sets = [s for s in stats["sets"] if s["weight"] is not None and s["reps"] is not None]
+        if valid_sets:
+            stats["avg_weight"] = sum(s["weight"] for s in valid_sets) / len(valid_sets)
+            stats["avg_reps"] = sum(s["reps"] for s in valid_sets) / len(valid_sets)
+        else:
+            stats["avg_weight"] = 0
+            stats["avg_reps"] = 0
+    
     def _generate_exercise_suggestion(self, exercise_name: str, progression: List[str], avg_weight: float, avg_reps: float) -> str:
         """
         Generate a personalized suggestion for a specific exercise based on progression data.
@@ -15,6 +15,8 @@ setup(
         "pydantic",
         "requests",
         "python-multipart",
-        "httpx"
+        "httpx[http2]",
+        "cachetools",
+        "orjson"
     ],
 ) 
\ No newline at end of file
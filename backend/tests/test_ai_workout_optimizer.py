@@ -0,0 +1,88 @@
+import pytest
+import re
+from unittest.mock import AsyncMock
+from app.services.ai_workout_optimizer import AIWorkoutOptimizer, _goal_muscle_groups
+from app.services.hevy_api import HevyAPI
+
+@pytest.fixture
+def ai_optimizer():
+    """Create an AIWorkoutOptimizer with a mock HevyAPI and a pending swap of Dips / Weighted Dips / Push Up"""
+    optimizer = AIWorkoutOptimizer(AsyncMock(spec=HevyAPI))
+    suggestions_lower = {"dips": "Dips", "weighted dips": "Weighted Dips", "push up": "Push Up"}
+    optimizer.pending_swap_context = {
+        "type": "EXERCISE_SWAP",
+        "suggestions_lower": suggestions_lower,
+        "suggestions_re": re.compile("|".join(
+            re.escape(low) for low in sorted(suggestions_lower, key=len, reverse=True)
+        )),
+    }
+    return optimizer
+
+# Goal Keyword Tests
+class TestGoalMuscleGroups:
+    def test_goal_keywords_match(self):
+        """Test that muscle keywords (and their plurals) narrow the muscle groups"""
+        assert _goal_muscle_groups("develop my chest") == ["chest", "triceps", "shoulders"]
+        assert _goal_muscle_groups("bigger Lats and biceps") == ["lats", "upper_back", "biceps", "forearms"]
+        assert _goal_muscle_groups("stronger legs") == ["quadriceps", "hamstrings", "glutes", "calves", "adductors", "abductors"]
+
+    def test_no_goal(self):
+        """Test that a missing goal implies no muscle groups"""
+        assert _goal_muscle_groups(None) == []
+        assert _goal_muscle_groups("") == []
+
+    @pytest.mark.parametrize("goal", [
+        "improve my flat bench",
+        "add a plate to my squat",
+        "a specific program",
+        "warm up better",
+        "a legit program",
+        "absolute strength",
+        "raise my powerlifting score",
+        "use a lifting strap",
+        "make a comeback",
+    ])
+    def test_keywords_inside_other_words_are_ignored(self, goal: str):
+        """Test that keywords embedded in unrelated words don't narrow the muscle groups"""
+        assert _goal_muscle_groups(goal) == []
+
+# Pending Swap Tests
+class TestMatchPendingSuggestion:
+    def test_exact_reply(self, ai_optimizer):
+        """Test a reply that is just the suggestion's title"""
+        assert ai_optimizer.match_pending_suggestion("push up!") == "Push Up"
+
+    def test_title_in_sentence(self, ai_optimizer):
+        """Test a suggestion mentioned inside a longer reply, preferring the longest title"""
+        assert ai_optimizer.match_pending_suggestion("let's go with weighted dips please") == "Weighted Dips"
+        assert ai_optimizer.match_pending_suggestion("ok, dips then") == "Dips"
+
+    def test_no_match(self, ai_optimizer):
+        """Test replies that mention no suggestion, or arrive with no swap pending"""
+        assert ai_optimizer.match_pending_suggestion("what about squats?") is None
+        ai_optimizer.pending_swap_context = None
+        assert ai_optimizer.match_pending_suggestion("dips") is None
+
+# Template Cache Tests
+class TestLoadTemplatesCache:
+    @pytest.mark.asyncio
+    async def test_cache_keeps_fetch_order(self, monkeypatch):
+        """Test that loading indexes the templates without reordering what the model sees"""
+        for attr in ("_cached_templates", "_templates_sample", "_cached_exercise_list_str",
+                     "_cached_templates_by_title", "_title_to_muscle", "_muscle_to_templates"):
+            monkeypatch.setattr(AIWorkoutOptimizer, attr, None)
+        templates = [
+            {"title": "Squat (Barbell)", "id": "t1", "primary_muscle_group": "quadriceps"},
+            {"title": "Bench Press (Barbell)", "id": "t2", "primary_muscle_group": "chest"},
+            {"title": "Leg Press", "id": "t3", "primary_muscle_group": "quadriceps"},
+            {"title": "Chest Dip", "id": "t4", "primary_muscle_group": "chest"},
+        ]
+        hevy_api = AsyncMock(spec=HevyAPI)
+        hevy_api.get_all_exercise_templates.return_value = templates
+        await AIWorkoutOptimizer.load_templates_cache(hevy_api)
+
+        assert AIWorkoutOptimizer._cached_templates == templates
+        assert AIWorkoutOptimizer._cached_exercise_list_str.splitlines()[0] == "- Squat (Barbell)"
+        assert '"Squat (Barbell)"' in AIWorkoutOptimizer._templates_sample.split(",")[0]
+        assert [t["id"] for t in AIWorkoutOptimizer._muscle_to_templates["quadriceps"]] == ["t1", "t3"]
+        assert list(AIWorkoutOptimizer._muscle_to_templates) == ["chest", "quadriceps"]
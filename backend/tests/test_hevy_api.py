@@ -1,15 +1,26 @@
 import pytest
-from app.services.hevy_api import HevyAPI
+from app.services.hevy_api import HevyAPI, _raise_on_error
 from typing import Dict, Any
-import requests
+import httpx
 from datetime import datetime, timedelta
 import asyncio
+import logging
 
 @pytest.fixture
 def hevy_api():
     """Create a HevyAPI instance for testing"""
     return HevyAPI()
 
+def mock_hevy_api(handler) -> HevyAPI:
+    """Create a HevyAPI whose requests are answered offline by handler(request) -> httpx.Response"""
+    api = HevyAPI()
+    api.client = httpx.AsyncClient(
+        headers=api.headers,
+        transport=httpx.MockTransport(handler),
+        event_hooks={"response": [_raise_on_error]}
+    )
+    return api
+
 # Workout Endpoint Tests
 class TestWorkoutEndpoints:
     @pytest.mark.asyncio
@@ -45,6 +56,15 @@ class TestWorkoutEndpoints:
             assert "id" in workout
             assert "title" in workout
 
+    @pytest.mark.asyncio
+    async def test_iter_workouts(self, hevy_api: HevyAPI):
+        """Test streaming workouts with next-page prefetch"""
+        workouts = [workout async for workout in hevy_api.iter_workouts(limit=5)]
+        assert isinstance(workouts, list)
+        if workouts:
+            assert "id" in workouts[0]
+            assert "title" in workouts[0]
+
     @pytest.mark.asyncio
     @pytest.mark.serial
     async def test_create_workout(self, hevy_api: HevyAPI):
@@ -350,23 +370,213 @@ class TestErrorCases:
     @pytest.mark.asyncio
     async def test_invalid_workout_id(self, hevy_api: HevyAPI):
         """Test handling of invalid workout ID"""
-        with pytest.raises(requests.exceptions.HTTPError):
+        with pytest.raises(httpx.HTTPStatusError):
             await hevy_api.get_workout("invalid_id")
 
     @pytest.mark.asyncio
     async def test_invalid_routine_id(self, hevy_api: HevyAPI):
         """Test handling of invalid routine ID"""
-        with pytest.raises(requests.exceptions.HTTPError):
+        with pytest.raises(httpx.HTTPStatusError):
             await hevy_api.get_routine("invalid_id")
 
     @pytest.mark.asyncio
     async def test_invalid_template_id(self, hevy_api: HevyAPI):
         """Test handling of invalid exercise template ID"""
-        with pytest.raises(requests.exceptions.HTTPError):
+        with pytest.raises(httpx.HTTPStatusError):
             await hevy_api.get_exercise_template("invalid_id")
 
     @pytest.mark.asyncio
     async def test_invalid_folder_id(self, hevy_api: HevyAPI):
         """Test handling of invalid routine folder ID"""
-        with pytest.raises(requests.exceptions.HTTPError):
-            await hevy_api.get_routine_folder("invalid_id") 
\ No newline at end of file
+        with pytest.raises(httpx.HTTPStatusError):
+            await hevy_api.get_routine_folder("invalid_id") 
+
+# Offline tests against a mocked transport
+class TestMockedTransport:
+    @pytest.mark.asyncio
+    async def test_failed_page_is_not_cached(self):
+        """A failing page fails the whole crawl and leaves nothing cached"""
+        failing = True
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            page = int(request.url.params["page"])
+            if page == 2 and failing:
+                return httpx.Response(500)
+            return httpx.Response(200, json={"page": page, "page_count": 3, "routines": [{"id": f"r{page}", "title": f"Routine {page}"}]})
+
+        api = mock_hevy_api(handler)
+        with pytest.raises(httpx.HTTPStatusError):
+            await api.get_all_routines()
+        assert "routines" not in api._listing_cache
+
+        failing = False # API recovered; the next call crawls again
+        routines = await api.get_all_routines()
+        assert [routine["id"] for routine in routines] == ["r1", "r2", "r3"]
+        assert (await api.find_routine_by_title("Routine 2"))["id"] == "r2"
+
+    @pytest.mark.asyncio
+    async def test_find_routine_by_title_fetches_each_page_once(self):
+        """A cold lookup that misses on page 1 crawls the remaining pages without refetching page 1"""
+        requested_pages = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            page = int(request.url.params["page"])
+            requested_pages.append(page)
+            return httpx.Response(200, json={"page": page, "page_count": 3, "routines": [{"id": f"r{page}", "title": f"Routine {page}"}]})
+
+        api = mock_hevy_api(handler)
+        assert (await api.find_routine_by_title("Routine 3"))["id"] == "r3"
+        assert sorted(requested_pages) == [1, 2, 3]
+
+        assert (await api.find_routine_by_title("Routine 2"))["id"] == "r2" # Served from the title index
+        assert len(requested_pages) == 3
+
+    @pytest.mark.asyncio
+    async def test_find_routine_folder_by_id_falls_back_to_listing(self, caplog):
+        """A 404 on the direct folder GET falls back to the folder listing without logging an error"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/v1/routine_folders":
+                return httpx.Response(200, json={"page": 1, "page_count": 1, "routine_folders": [{"id": 42, "title": "PPL"}]})
+            return httpx.Response(404, json={"error": "not found"})
+
+        api = mock_hevy_api(handler)
+        with caplog.at_level(logging.DEBUG, logger="app.services.hevy_api"):
+            folder = await api.find_routine_folder_by_id(42)
+        assert folder == {"id": 42, "title": "PPL"}
+        assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
+        assert await api.find_routine_folder_by_id(7) is None # Not in the listing either
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_request_is_retried(self):
+        """A 429 is retried after the server's Retry-After"""
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            if len(calls) == 1:
+                return httpx.Response(429, headers={"Retry-After": "0"})
+            return httpx.Response(200, json={"id": "w1", "title": "Upper A", "exercises": []})
+
+        api = mock_hevy_api(handler)
+        workout = await api.get_workout("w1")
+        assert workout["id"] == "w1"
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_post_is_not_retried_on_server_error(self):
+        """A 5xx on a POST is raised without retrying, since the first attempt may have created the resource"""
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            return httpx.Response(503, headers={"Retry-After": "0"})
+
+        api = mock_hevy_api(handler)
+        with pytest.raises(httpx.HTTPStatusError):
+            await api.create_workout({"workout": {"title": "Test Workout"}})
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_cache_entry_is_revalidated(self):
+        """A stale cached response is revalidated with If-None-Match and a 304 reuses the cached body"""
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304, headers={"ETag": '"v1"'})
+            return httpx.Response(200, headers={"ETag": '"v1"'}, json={"id": "e1", "title": "Bench Press"})
+
+        api = mock_hevy_api(handler)
+        first = await api.get_exercise("e1")
+        assert await api.get_exercise("e1") is first # Fresh: no request
+        assert len(calls) == 1
+
+        for key, (etag, body, _, size) in list(api._response_cache.items()):
+            api._response_cache[key] = (etag, body, 0.0, size) # Expire the entry
+        assert await api.get_exercise("e1") == {"id": "e1", "title": "Bench Press"}
+        assert len(calls) == 2
+        assert calls[1].headers["If-None-Match"] == '"v1"'
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_gets_share_one_request(self):
+        """Concurrent misses for the same resource are answered by a single request"""
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            return httpx.Response(200, json={"id": "t1", "title": "Squat (Barbell)"})
+
+        api = mock_hevy_api(handler)
+        templates = await asyncio.gather(*(api.get_exercise_template("t1") for _ in range(5)))
+        assert all(template["id"] == "t1" for template in templates)
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_routine_writes_invalidate_listing(self):
+        """Creating or updating a routine drops the cached routine listing"""
+        listing_requests = []
+        titles = ["Upper A"]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.method == "GET":
+                listing_requests.append(request)
+                routines = [{"id": f"r{i}", "title": title} for i, title in enumerate(titles)]
+                return httpx.Response(200, json={"page": 1, "page_count": 1, "routines": routines})
+            titles.append("Lower A")
+            return httpx.Response(200, json={"routine": [{"id": "r1", "title": "Lower A"}]})
+
+        api = mock_hevy_api(handler)
+        assert [routine["title"] for routine in await api.get_all_routines()] == ["Upper A"]
+        await api.get_all_routines() # Cached
+        assert len(listing_requests) == 1
+
+        await api.create_routine({"routine": {"title": "Lower A", "exercises": []}})
+        assert "routines" not in api._listing_cache
+        assert [routine["title"] for routine in await api.get_all_routines()] == ["Upper A", "Lower A"]
+        assert len(listing_requests) == 2
+
+        await api.update_routine("r1", {"routine": {"title": "Lower A", "exercises": []}})
+        assert "routines" not in api._listing_cache
+
+    @pytest.mark.asyncio
+    async def test_client_is_usable_after_aclose(self):
+        """Closing the shared instance leaves a fresh client behind for the next app startup"""
+        api = mock_hevy_api(lambda request: httpx.Response(200, json={}))
+        closed_client = api.client
+        await api.aclose()
+        assert closed_client.is_closed
+        assert not api.client.is_closed
+        await api.aclose()
+
+    @pytest.mark.asyncio
+    async def test_template_without_id_is_skipped(self):
+        """A malformed template without an id is dropped instead of failing the whole crawl"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={"page": 1, "page_count": 1, "exercise_templates": [
+                {"id": "t1", "title": "Squat (Barbell)", "primary_muscle_group": "quadriceps"},
+                {"title": "Broken Template"},
+            ]})
+
+        api = mock_hevy_api(handler)
+        templates = await api.get_all_exercise_templates()
+        assert templates == [{"title": "Squat (Barbell)", "id": "t1", "primary_muscle_group": "quadriceps"}]
+
+    @pytest.mark.asyncio
+    async def test_get_routines_in_folder_uses_listing_index(self):
+        """Routines in a folder come from one crawl of the routine listing, grouped by folder_id"""
+        listing_requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            listing_requests.append(request)
+            return httpx.Response(200, json={"page": 1, "page_count": 1, "routines": [
+                {"id": "r1", "title": "Push", "folder_id": 1},
+                {"id": "r2", "title": "Pull", "folder_id": 2},
+                {"id": "r3", "title": "Legs", "folder_id": 1},
+            ]})
+
+        api = mock_hevy_api(handler)
+        assert [routine["id"] for routine in await api.get_routines_in_folder(1)] == ["r1", "r3"]
+        assert await api.get_routines_in_folder(3) == []
+        assert len(listing_requests) == 1
+        assert all(request.url.path == "/v1/routines" for request in listing_requests)
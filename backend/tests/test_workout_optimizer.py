@@ -105,6 +105,45 @@ class TestWorkoutOptimizer:
         mock_hevy_api.get_workout_events.assert_called_once()
         assert mock_hevy_api.get_workout.call_count == 2
     
+    @pytest.mark.asyncio
+    async def test_analyze_one_exercise(self, workout_optimizer, mock_hevy_api):
+        """Test analyzing a single exercise only aggregates that exercise"""
+        today = datetime.utcnow()
+        yesterday = today - timedelta(days=1)
+
+        # Mock the API responses
+        mock_hevy_api.get_workouts.return_value = {
+            "data": [
+                {
+                    "id": "workout1",
+                    "start_time": today.isoformat(),
+                    "exercises": [
+                        {"exercise_template_id": "D04AC939", "title": "Squat (Barbell)", "sets": [{"weight_kg": 100, "reps": 10}]},
+                        {"exercise_template_id": "79D0BB3A", "title": "Bench Press (Barbell)", "sets": [{"weight_kg": 80, "reps": 8}]}
+                    ]
+                },
+                {
+                    "id": "workout2",
+                    "start_time": yesterday.isoformat(),
+                    "exercises": [
+                        {"exercise_template_id": "D04AC939", "title": "Squat (Barbell)", "sets": [{"weight_kg": 95, "reps": 12}]}
+                    ]
+                }
+            ]
+        }
+
+        # Call the method
+        result = await workout_optimizer.analyze_one_exercise("D04AC939", days=30)
+
+        # Verify the result
+        assert result["name"] == "Squat (Barbell)"
+        assert result["count"] == 2
+        assert result["total_weight"] == 195
+        assert result["avg_reps"] == 11
+
+        # Exercises that weren't performed return None
+        assert await workout_optimizer.analyze_one_exercise("MISSING", days=30) is None
+
     @pytest.mark.asyncio
     async def test_get_optimization_suggestions(self, workout_optimizer, mock_hevy_api):
         """Test getting optimization suggestions"""